@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -32,8 +33,40 @@ INSTALLED_APPS = [
 ]
 
 COUNT_POST_PAGE: int = 10
+COUNT_COMMENT_PAGE: int = 20
+COUNT_FOLLOW_PAGE: int = 50
+COUNT_FEED_ITEMS: int = 20
 NUM_VERBS_STR: int = 15
-CACHE_TIME = 20
+# Время жизни кэшированных фрагментов: они сбрасываются версиями ключей
+CACHE_TIME = 60 * 10
+# Размеры миниатюр, которые шаблоны берут готовыми (их создаёт очередь
+# фоновых задач), и число потоков команды generate_thumbnails
+POST_THUMBNAILS = {
+    'card': ('600x300', {'crop': 'center', 'upscale': True}),
+    'detail': ('700x339', {'crop': 'center', 'upscale': True}),
+}
+THUMBNAIL_WORKERS: int = 2
+# Очередь фоновых задач (core/jobs.py) и её воркер manage.py run_jobs
+JOBS_PROCESSES: int = int(os.getenv('JOBS_PROCESSES', '2'))
+JOBS_MAX_ATTEMPTS: int = 5
+# Пауза перед второй попыткой, дальше вдвое больше до JOBS_BACKOFF_MAX
+JOBS_BACKOFF: int = 10
+JOBS_BACKOFF_MAX: int = 60 * 60
+# Задача воркера, который не ответил за это время, снова идёт в очередь
+JOBS_TIMEOUT: int = 15 * 60
+# Сколько хранить упавшие задачи для разбора и повтора из админки
+JOBS_KEEP_FAILED: int = 7 * 24 * 60 * 60
+JOBS_POLL_INTERVAL: float = 1.0
+# Выполнять задачи сразу после фиксации в том же процессе, без воркера
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'False') == 'True'
+# Авторы с большим числом подписчиков не раскладываются в ленты подписок
+TIMELINE_FANOUT_LIMIT: int = 10_000
+# Сколько последних постов автора попадает в ленту сразу при подписке,
+# остальные добавляет фоновая задача
+TIMELINE_BACKFILL: int = COUNT_POST_PAGE * 5
+# Асинхронные ленты из posts/async_views.py; выключены и под ASGI,
+# пока compare_handlers не покажет, что они быстрее синхронных
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
 
 
 LOGIN_URL = 'users:login'
@@ -44,17 +77,39 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загрузки больше мегабайта пишутся во временный файл, а не в память
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+UPLOAD_MAX_PIXELS = 50_000_000
+UPLOAD_MAX_SIDE = 2048
+UPLOAD_JPEG_QUALITY = 85
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.performance.InstrumentedLocMemCache',
     }
 }
+# CACHE_BACKEND=sqlite — общий для всех воркеров кэш в файле
+if os.getenv('CACHE_BACKEND') == 'sqlite':
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.sqlite_cache.SQLiteCache',
+            'LOCATION': os.getenv(
+                'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache.sqlite3')
+            ),
+            'OPTIONS': {
+                'MAX_ENTRIES': 100_000,
+            },
+        }
+    }
 
 
 MIDDLEWARE = [
+    'core.middleware.performance_middleware',
+    'core.middleware.replica_middleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -69,7 +124,7 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.performance.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -79,6 +134,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.cache_time.cache_time',
             ],
         },
     },
@@ -86,8 +142,38 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Строки лога core.performance — по одной JSON-строке на запрос
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.performance': {
+            'handlers': ['console'],
+            'level': os.getenv(
+                'PERFORMANCE_LOG_LEVEL',
+                'WARNING' if sys.argv[1:2] == ['test'] else 'INFO',
+            ),
+            'propagate': False,
+        },
+    },
+}
+
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.getenv(
+    'STATIC_ROOT', os.path.join(BASE_DIR, 'collected_static')
+)
+# CSS, из которого collectstatic вырезает правила с классами, которых нет
+# в шаблонах, скриптах и модулях приложений (core/staticfiles.py)
+STATIC_PURGE_CSS = ['css/bootstrap.min.css']
+STATIC_PURGE_CONTENT = [
+    os.path.join(BASE_DIR, name)
+    for name in ('templates', 'static/js', 'posts', 'users', 'core', 'about')
+]
+
 if DEBUG:
-    STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
@@ -95,7 +181,8 @@ if DEBUG:
         }
     }
 else:
-    STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
+    # Имена с хэшем содержимого и сжатые копии: collectstatic
+    STATICFILES_STORAGE = 'core.staticfiles.ProductionStaticFilesStorage'
     DATABASES = {
         'default': {
             'ENGINE': os.getenv('DB_ENGINE'),
@@ -106,6 +193,53 @@ else:
             'PORT': os.getenv('DB_PORT')
         }
     }
+
+# Лимиты пишущих запросов (core/ratelimit.py): (ёмкость, секунд на её
+# пополнение) — столько запросов подряд, дальше равномерно за период
+RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True') == 'True'
+RATELIMITS = {
+    'post_create': (10, 10 * 60),
+    'comment': (20, 5 * 60),
+    'follow': (30, 5 * 60),
+    'signup': (5, 60 * 60),
+}
+# Откуда брать IP анонима; за прокси — например, 'HTTP_X_REAL_IP'
+RATELIMIT_IP_META = os.getenv('RATELIMIT_IP_META', 'REMOTE_ADDR')
+
+# Режим SQLite для нескольких воркеров, задаётся каждому соединению
+# (core/sqlite_tuning.py); SQLITE_TUNED=False оставляет настройки SQLite
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ: 64 МиБ на соединение
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+} if os.getenv('SQLITE_TUNED', 'True') == 'True' else {}
+# Сколько раз повторять запрос или транзакцию при блокировке базы
+SQLITE_LOCK_RETRIES = int(os.getenv('SQLITE_LOCK_RETRIES', '5'))
+
+# Реплики только для чтения через запятую: файлы SQLite рядом с основной
+# базой при DEBUG, иначе хосты с теми же настройками, что у основной
+DB_REPLICAS = [
+    name.strip() for name in os.getenv('DB_REPLICAS', '').split(',')
+    if name.strip()
+]
+for number, replica in enumerate(DB_REPLICAS, start=1):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        **(
+            {'NAME': os.path.join(BASE_DIR, replica)} if DEBUG
+            else {'HOST': replica}
+        ),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+# Сколько секунд после своей записи пользователь читает основную базу
+PRIMARY_STICKY_SECONDS = int(os.getenv('PRIMARY_STICKY_SECONDS', '5'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
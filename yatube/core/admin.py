@@ -0,0 +1,30 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'func',
+        'status',
+        'priority',
+        'attempts',
+        'run_at',
+        'key',
+    )
+    list_filter = ('status', 'func')
+    search_fields = ('key',)
+    actions = ('requeue',)
+
+    @admin.action(description='Вернуть в очередь')
+    def requeue(self, request, queryset):
+        queued_keys = Job.objects.filter(
+            status=Job.QUEUED, key__isnull=False
+        ).values('key')
+        queryset.filter(status=Job.FAILED).exclude(
+            key__in=queued_keys
+        ).update(
+            status=Job.QUEUED, attempts=0, locked_by='', locked_at=None,
+        )
@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .performance import install_query_recorder
+        from .sqlite_tuning import configure_connection
+        connection_created.connect(install_query_recorder)
+        connection_created.connect(configure_connection)
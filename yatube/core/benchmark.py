@@ -0,0 +1,327 @@
+"""
+Бенчмарк адресов сайта на сгенерированных данных.
+
+seed() наполняет базу пользователями, группами, постами, комментариями
+и подписками. Число подписчиков распределено по степенному закону:
+немногие авторы собирают большую часть подписок, как в живой сети.
+measure() обходит все адреса posts/urls.py и about/urls.py и для каждого
+меряет время ответа с пустым и прогретым кэшем, число SQL-запросов
+и число строк, которые эти запросы вернули. Кэш для холодных замеров
+очищается, поэтому замеры идут на своём кэше (isolated_caches()),
+а не на кэше сайта. compare() сравнивает результат с сохранённым
+прогоном и возвращает регрессии.
+"""
+import itertools
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+from django.utils.module_loading import import_string
+from faker import Faker
+
+from about import urls as about_urls
+from posts import counters, search, timeline
+from posts import urls as posts_urls
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+SCALES = {
+    '1k': {
+        'users': 200, 'groups': 10, 'posts': 1_000, 'comments': 3_000,
+    },
+    '100k': {
+        'users': 10_000, 'groups': 100, 'posts': 100_000,
+        'comments': 300_000,
+    },
+    '1m': {
+        'users': 100_000, 'groups': 1_000, 'posts': 1_000_000,
+        'comments': 3_000_000,
+    },
+}
+METRICS = ('cold_ms', 'warm_ms', 'queries', 'rows')
+# Изменения меньше этих значений считаются шумом.
+NOISE = {'cold_ms': 5.0, 'warm_ms': 5.0, 'queries': 0, 'rows': 0}
+BATCH_SIZE = 5_000
+TEXTS = 500
+ZIPF_EXPONENT = 1.1
+
+
+def _zipf_weights(count):
+    return [1 / rank ** ZIPF_EXPONENT for rank in range(1, count + 1)]
+
+
+def _insert(model, objects):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+@contextmanager
+def _explicit_dates(*fields):
+    # bulk_create подставляет текущее время в поля с auto_now_add.
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+@transaction.atomic
+def seed(users, groups, posts, comments, seed=1):
+    """Наполняет пустую базу данными заданного размера
+    в одной транзакции."""
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    texts = [fake.paragraph(nb_sentences=3) for _ in range(TEXTS)]
+    _insert(User, (
+        User(
+            username=f'user{number:07d}',
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+            password='!',
+        ) for number in range(users)
+    ))
+    _insert(Group, (
+        Group(
+            title=fake.sentence(nb_words=3)[:200],
+            slug=f'group-{number}',
+            description=fake.sentence(),
+        ) for number in range(groups)
+    ))
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+    weights = list(itertools.accumulate(_zipf_weights(len(user_ids))))
+
+    # Самые читаемые авторы и самые плодовитые — разные люди.
+    posters = rng.sample(user_ids, len(user_ids))
+
+    def pick_users(count, population=user_ids):
+        return rng.choices(population, cum_weights=weights, k=count)
+
+    start = timezone.now() - timedelta(days=365)
+    step = timedelta(days=365) / max(posts, 1)
+    with _explicit_dates(Post._meta.get_field('pub_date')):
+        _insert(Post, (
+            Post(
+                author_id=author_id,
+                group_id=(
+                    rng.choice(group_ids)
+                    if group_ids and rng.random() < 0.7 else None
+                ),
+                text=rng.choice(texts),
+                pub_date=start + step * number,
+            ) for number, author_id in enumerate(pick_users(posts, posters))
+        ))
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    with _explicit_dates(Comment._meta.get_field('created')):
+        _insert(Comment, (
+            Comment(
+                post_id=rng.choice(post_ids),
+                author_id=rng.choice(user_ids),
+                text=rng.choice(texts),
+                created=timezone.now(),
+            ) for _ in range(comments if post_ids else 0)
+        ))
+    _insert(Follow, (
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id in user_ids
+        for author_id in set(pick_users(
+            min(int(rng.paretovariate(1.2)) * 5, len(user_ids))
+        ))
+        if author_id != user_id
+    ))
+    counters.reconcile()
+    timeline.rebuild()
+    search.reindex()
+
+
+def reader():
+    """Автор с наибольшим числом подписок: от его имени идут запросы."""
+    return User.objects.filter(stats__posts_count__gt=0).order_by(
+        '-stats__following_count'
+    ).first()
+
+
+def samples(user):
+    """Параметры адресов: самые нагруженные объекты. Ключ (адрес,
+    параметр) задаёт значение для одного адреса."""
+    post = Post.objects.order_by('-comments_count').first()
+    return {
+        'slug': Group.objects.order_by('-posts_count').first().slug,
+        'username': User.objects.order_by(
+            '-stats__posts_count'
+        ).first().username,
+        'post_id': post.pk,
+        ('posts:post_edit', 'post_id'): user.post.latest('pub_date').pk,
+        ('posts:search', 'q'): post.text.split()[0],
+        ('posts:followers', 'username'): User.objects.order_by(
+            '-stats__followers_count'
+        ).first().username,
+        ('posts:following', 'username'): user.username,
+    }
+
+
+def routes(values):
+    """(имя, адрес) для всех адресов posts/urls.py и about/urls.py."""
+    result = []
+    for module in (posts_urls, about_urls):
+        for pattern in module.urlpatterns:
+            name = f'{module.app_name}:{pattern.name}'
+            kwargs = {
+                key: values.get((name, key), values.get(key))
+                for key in pattern.pattern.converters
+            }
+            url = reverse(name, kwargs=kwargs)
+            query = {
+                key[1]: value for key, value in values.items()
+                if key[0] == name and key[1] not in kwargs
+            }
+            if query:
+                url = f'{url}?{urlencode(query)}'
+            result.append((name, url))
+    return result
+
+
+class QueryRecorder:
+    """Запоминает SQL и параметры всех запросов через execute_wrapper."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, params, many))
+        return execute(sql, params, many, context)
+
+    def count_rows(self):
+        """Сколько строк вернули запросы SELECT: каждый пересчитывается
+        через COUNT(*), поэтому вызывать до отката транзакции."""
+        total = 0
+        with connection.cursor() as cursor:
+            for sql, params, many in self.queries:
+                if many or not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM ({sql}) benchmark_rows', params
+                )
+                total += cursor.fetchone()[0]
+        return total
+
+
+def _get(client, url):
+    response = client.get(url)
+    if response.streaming:
+        # Потоковый ответ строится при чтении: дочитываем его в замер.
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def _request(client, url, recorder=None):
+    """Запрос в транзакции, которая откатывается: подписка и отписка
+    по GET не меняют данные для следующих прогонов."""
+    with transaction.atomic():
+        started = time.perf_counter()
+        if recorder is None:
+            response = _get(client, url)
+        else:
+            with connection.execute_wrapper(recorder):
+                response = _get(client, url)
+        elapsed = (time.perf_counter() - started) * 1000
+        rows = recorder.count_rows() if recorder is not None else None
+        transaction.set_rollback(True)
+    return response.status_code, elapsed, rows
+
+
+def isolated_caches():
+    """
+    Настройки кэша для замеров: тот же бэкенд, но своё хранилище.
+    clear() серверного кэша стёр бы записи всех сайтов на сервере,
+    поэтому вместо него берётся LocMemCache.
+    """
+    default = settings.CACHES['default']
+    backend = import_string(default['BACKEND'])
+    if default['BACKEND'] == 'core.sqlite_cache.SQLiteCache':
+        location = str(settings.BASE_DIR / 'benchmark_cache.sqlite3')
+    elif issubclass(backend, LocMemCache):
+        location = 'benchmark'
+    else:
+        return {'default': {
+            'BACKEND': 'core.performance.InstrumentedLocMemCache',
+            'LOCATION': 'benchmark',
+        }}
+    return {'default': {**default, 'LOCATION': location}}
+
+
+def measure(client, urls, repeats=5):
+    """Метрики каждого адреса: медианы времени по repeats прогонам."""
+    with override_settings(CACHES=isolated_caches()):
+        return _measure(client, urls, repeats)
+
+
+def _measure(client, urls, repeats):
+    results = {}
+    for name, url in urls:
+        cold, warm = [], []
+        recorder = QueryRecorder()
+        cache.clear()
+        status, _, rows = _request(client, url, recorder)
+        for _ in range(repeats):
+            cache.clear()
+            cold.append(_request(client, url)[1])
+            warm.append(_request(client, url)[1])
+        results[name] = {
+            'url': url,
+            'status': status,
+            'cold_ms': round(statistics.median(cold), 3),
+            'warm_ms': round(statistics.median(warm), 3),
+            'queries': len(recorder.queries),
+            'rows': rows,
+        }
+    return results
+
+
+def compare(current, baseline, threshold):
+    """Регрессии: метрики, выросшие больше чем на долю threshold."""
+    regressions = []
+    for name, metrics in current.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in METRICS:
+            old, new = previous[metric], metrics[metric]
+            if new - old > NOISE[metric] and new > old * (1 + threshold):
+                regressions.append({
+                    'route': name,
+                    'metric': metric,
+                    'baseline': old,
+                    'current': new,
+                })
+    return regressions
+
+
+def environment():
+    return {
+        'database': connection.vendor,
+        'cache': isolated_caches()['default']['BACKEND'],
+        'async_views': settings.ASYNC_VIEWS,
+    }
@@ -0,0 +1,7 @@
+from django.conf import settings
+
+
+def cache_time(request):
+    return {
+        'CACHE_TIME': settings.CACHE_TIME
+    }
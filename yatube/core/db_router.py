@@ -0,0 +1,140 @@
+"""
+Чтение лент с реплик.
+
+replica_middleware (core/middleware.py) заводит на время запроса
+RoutingState в contextvar. Представления лент и страницы поста,
+помеченные replica_reads, переключают чтения запроса на случайную
+реплику из settings.DATABASE_REPLICAS, но только для GET и HEAD.
+Любая запись идёт в основную базу, и после неё до конца запроса
+чтения тоже идут туда. Ответ на запрос с записью ставит cookie,
+и ещё settings.PRIMARY_STICKY_SECONDS секунд этот пользователь читает
+только основную базу: реплика может не успеть получить его запись.
+Сессии всегда читаются из основной базы.
+
+Кэш фрагментов с версиями (posts/caching.py) реплике не доверяет:
+версию меняет запись в основной базе, и отставшая реплика положила бы
+под новую версию старые данные до следующей правки, а клиенты получили
+бы совпадающий с ними ETag. Поэтому фрагменты, карточки постов и ленты
+RSS, которых нет в кэше, собираются внутри primary_reads() из основной
+базы; реплика обслуживает остальные чтения страницы.
+"""
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+STICKY_COOKIE = 'primary_until'
+PRIMARY_ONLY_APPS = {'sessions'}
+SAFE_METHODS = ('GET', 'HEAD')
+
+_current = ContextVar('db_routing', default=None)
+
+
+class RoutingState:
+    __slots__ = ('replica', 'sticky', 'wrote')
+
+    def __init__(self, sticky=False):
+        self.replica = False
+        self.sticky = sticky
+        self.wrote = False
+
+
+def is_sticky(request):
+    """Пользователь недавно писал и читает основную базу."""
+    try:
+        until = float(request.COOKIES.get(STICKY_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+def start(request):
+    state = RoutingState(sticky=is_sticky(request))
+    return state, _current.set(state)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def mark_primary(response, state):
+    """После записи ставит cookie, которое держит чтения на основной базе."""
+    window = settings.PRIMARY_STICKY_SECONDS
+    if state.wrote and window:
+        response.set_cookie(
+            STICKY_COOKIE, f'{time.time() + window:.3f}', max_age=window,
+            httponly=True, samesite='Lax',
+        )
+    return response
+
+
+def use_replica(request):
+    state = _current.get()
+    if (
+        state is not None and not state.sticky
+        and request.method in SAFE_METHODS
+    ):
+        state.replica = True
+
+
+@contextmanager
+def primary_reads():
+    """Чтения внутри блока идут в основную базу, даже в представлении
+    с replica_reads."""
+    state = _current.get()
+    if state is None or not state.replica:
+        yield
+        return
+    state.replica = False
+    try:
+        yield
+    finally:
+        state.replica = True
+
+
+def replica_reads(view):
+    """Чтения запроса, включая отложенный рендеринг шаблона,
+    идут на реплику."""
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            use_replica(request)
+            return await view(request, *args, **kwargs)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            use_replica(request)
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            state is None or not state.replica or state.wrote
+            or not replicas or model._meta.app_label in PRIMARY_ONLY_APPS
+        ):
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схему на реплики переносит репликация (или sync_replicas).
+        return db not in settings.DATABASE_REPLICAS
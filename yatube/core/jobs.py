@@ -0,0 +1,195 @@
+"""
+Очередь фоновых задач в базе, без отдельного брокера.
+
+enqueue(func, args, kwargs) записывает задачу в таблицу core.Job
+в той же транзакции, что и данные запроса: задача видна воркеру только
+после фиксации, а откат запроса отменяет и её. Представление не ждёт
+выполнения. Воркер (manage.py run_jobs) выбирает пачку готовых задач
+по индексу (status, -priority, run_at, id) — сначала с большим
+приоритетом, — забирает их UPDATE с проверкой состояния, чтобы задачу
+не взяли два воркера, и выполняет в пуле процессов.
+
+Упавшая задача возвращается в очередь с экспоненциальной паузой
+до max_attempts попыток, потом остаётся в состоянии failed с текстом
+ошибки и удаляется через settings.JOBS_KEEP_FAILED, чтобы аргументы
+задач не копились в базе. Задачи с ключом key дедуплицируются: пока
+задача с ключом ждёт в очереди, повторный enqueue с тем же ключом
+возвращает её же.
+Выполненные задачи удаляются, а задачи воркера, который умер,
+не закончив их, через settings.JOBS_TIMEOUT снова попадают в очередь;
+попытка при этом засчитывается, так что задача, которая роняет
+воркер, тоже не повторяется вечно.
+
+Аргументы хранятся в JSON и видны в админке, поэтому в задачу
+передаются id, а не модели, и никаких секретов вроде токенов.
+При settings.JOBS_EAGER задачи выполняются сразу после фиксации
+в том же процессе — для разработки без воркера.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+HIGH = 10
+NORMAL = 0
+LOW = -10
+
+
+def _path(func):
+    if isinstance(func, str):
+        return func
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def enqueue(func, args=(), kwargs=None, priority=NORMAL, key=None,
+            delay=0, max_attempts=None):
+    """
+    Ставит вызов func(*args, **kwargs) в очередь и возвращает задачу.
+    func — функция уровня модуля или путь к ней. Если задача с тем же
+    key уже ждёт в очереди, возвращается она; если её забрали, пока
+    новая вставлялась, задача ставится снова.
+    """
+    job = Job(
+        func=_path(func),
+        args=list(args),
+        kwargs=kwargs or {},
+        priority=priority,
+        key=key,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    if key is None:
+        job.save()
+    else:
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    job.save()
+                break
+            except IntegrityError:
+                queued = Job.objects.filter(
+                    key=key, status=Job.QUEUED
+                ).first()
+                if queued is not None:
+                    return queued
+                # Задачу с тем же key успел забрать воркер: вставка
+                # повторяется один раз.
+                if attempt:
+                    raise
+    if settings.JOBS_EAGER:
+        transaction.on_commit(lambda: _run_now(job.pk))
+    return job
+
+
+def _take(queryset, batch, now):
+    return queryset.filter(status=Job.QUEUED).update(
+        status=Job.RUNNING, locked_by=batch, locked_at=now,
+        attempts=F('attempts') + 1,
+    )
+
+
+def _run_now(job_id):
+    if _take(Job.objects.filter(pk=job_id), 'eager', timezone.now()):
+        run(job_id)
+
+
+def worker_name():
+    return f'{socket.gethostname()[:40]}:{os.getpid()}'
+
+
+def claim(worker, limit):
+    """Забирает до limit готовых задач для воркера worker."""
+    # Метка пачки отличает её от задач воркера, которые ещё выполняются.
+    batch = f'{worker}:{uuid.uuid4().hex[:8]}'
+    now = timezone.now()
+    ids = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now
+    ).order_by('-priority', 'run_at', 'id').values_list(
+        'id', flat=True
+    )[:limit]
+    # Условие на status повторяется в UPDATE: задачу, которую
+    # между выборкой и записью забрал другой воркер, не взять.
+    if not _take(Job.objects.filter(id__in=list(ids)), batch, now):
+        return []
+    return list(
+        Job.objects.filter(locked_by=batch, status=Job.RUNNING)
+        .values_list('id', flat=True)
+    )
+
+
+def recover_stale():
+    """Возвращает в очередь задачи, которые воркер взял и не закончил."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOBS_TIMEOUT)
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff)
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, last_error='Воркер не закончил задачу',
+    )
+    # Такая же задача с тем же ключом уже ждёт в очереди.
+    stale.filter(key__in=Job.objects.filter(
+        status=Job.QUEUED, key__isnull=False
+    ).values('key')).delete()
+    return stale.update(status=Job.QUEUED, locked_by='', locked_at=None)
+
+
+def purge_failed():
+    """Удаляет упавшие задачи старше settings.JOBS_KEEP_FAILED."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOBS_KEEP_FAILED)
+    return Job.objects.filter(
+        status=Job.FAILED, run_at__lt=cutoff
+    ).delete()[0]
+
+
+def backoff(attempts):
+    """Пауза перед попыткой attempts + 1: растёт вдвое, со случайной
+    добавкой, чтобы упавшие вместе задачи не повторялись разом."""
+    base = settings.JOBS_BACKOFF * 2 ** (attempts - 1)
+    return min(base, settings.JOBS_BACKOFF_MAX) * (1 + random.random() / 2)
+
+
+def run(job_id):
+    """Выполняет задачу и записывает результат; True — выполнена."""
+    job = Job.objects.filter(pk=job_id).first()
+    if job is None:
+        return False
+    try:
+        import_string(job.func)(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception('Задача %s упала', job)
+        _failed(job, traceback.format_exc())
+        return False
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def _failed(job, error):
+    retry = job.attempts < job.max_attempts
+    update = {
+        'last_error': error,
+        'locked_by': '',
+        'locked_at': None,
+        'status': Job.QUEUED if retry else Job.FAILED,
+    }
+    if retry:
+        update['run_at'] = timezone.now() + timedelta(
+            seconds=backoff(job.attempts)
+        )
+    try:
+        with transaction.atomic():
+            Job.objects.filter(pk=job.pk).update(**update)
+    except IntegrityError:
+        # Пока задача выполнялась, в очередь встала такая же с тем же
+        # ключом: она и выполнит работу.
+        Job.objects.filter(pk=job.pk).delete()
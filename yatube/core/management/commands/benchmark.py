@@ -0,0 +1,121 @@
+import json
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from core import benchmark
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Меряет время, число запросов и строк для всех адресов на '
+        'сгенерированных данных и сравнивает с сохранённым прогоном'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', choices=benchmark.SCALES, default='1k',
+            help='Размер данных',
+        )
+        parser.add_argument('--repeats', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--reseed', action='store_true',
+            help='Пересоздать базу бенчмарка',
+        )
+        parser.add_argument('--output', help='Сохранить результат в JSON')
+        parser.add_argument(
+            '--compare', help='JSON прошлого прогона для сравнения',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый рост метрики (0.2 — на 20%%)',
+        )
+
+    def handle(self, *args, **options):
+        scale = options['scale']
+        self.use_benchmark_database(scale, options['reseed'])
+        if not Post.objects.exists():
+            self.stderr.write(f'Наполнение базы: {scale}')
+            benchmark.seed(**benchmark.SCALES[scale], seed=options['seed'])
+
+        # Тестовый клиент ходит с заголовком Host: testserver.
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        client = Client()
+        user = benchmark.reader()
+        client.force_login(user)
+        urls = benchmark.routes(benchmark.samples(user))
+        results = benchmark.measure(client, urls, options['repeats'])
+        report = {
+            'commit': self.commit(),
+            'scale': scale,
+            'repeats': options['repeats'],
+            'environment': benchmark.environment(),
+            'results': results,
+        }
+        self.print_table(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['compare']:
+            self.check_regressions(report, options)
+
+    def use_benchmark_database(self, scale, reseed):
+        """Своя база для каждого размера, как тестовая база у manage.py
+        test; она сохраняется между запусками."""
+        database = connection.settings_dict
+        if connection.vendor == 'sqlite':
+            name = str(settings.BASE_DIR / f'benchmark_{scale}.sqlite3')
+        else:
+            name = f'{database["NAME"]}_benchmark_{scale}'
+        database.setdefault('TEST', {})['NAME'] = name
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=not reseed,
+            serialize=False,
+        )
+
+    def check_regressions(self, report, options):
+        with open(options['compare'], encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline.get('scale') != report['scale']:
+            raise CommandError('Прогоны сделаны на данных разного размера')
+        regressions = benchmark.compare(
+            report['results'], baseline['results'], options['threshold']
+        )
+        for item in regressions:
+            self.stdout.write(self.style.ERROR(
+                '{route}: {metric} {baseline} -> {current}'.format(**item)
+            ))
+        if regressions:
+            raise CommandError(
+                f'Регрессий больше {options["threshold"]:.0%}: '
+                f'{len(regressions)}'
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def print_table(self, results):
+        self.stdout.write(
+            f'{"Адрес":<28}{"код":>5}{"холодный, мс":>14}'
+            f'{"тёплый, мс":>12}{"запросов":>10}{"строк":>10}'
+        )
+        for name, metrics in results.items():
+            self.stdout.write(
+                f'{name:<28}{metrics["status"]:>5}'
+                f'{metrics["cold_ms"]:>14.1f}{metrics["warm_ms"]:>12.1f}'
+                f'{metrics["queries"]:>10}{metrics["rows"]:>10}'
+            )
+
+    @staticmethod
+    def commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,108 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Как часто возвращать в очередь задачи воркеров, которые умерли,
+# и удалять старые упавшие задачи.
+RECOVER_EVERY = 60
+
+
+# Процессы пула запускаются через spawn, а не fork, и не наследуют
+# открытые соединения с базой. Зато они импортируют этот модуль до
+# django.setup(), поэтому модели (core.jobs) импортируются внутри функций.
+def _init_process():
+    django.setup()
+
+
+def _run(job_id):
+    from core import jobs
+    return jobs.run(job_id)
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди core.Job в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.JOBS_PROCESSES,
+            help='Процессов в пуле; 0 — выполнять в процессе команды',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти',
+        )
+        parser.add_argument(
+            '--poll', type=float, default=settings.JOBS_POLL_INTERVAL,
+            help='Пауза в секундах, когда задач нет',
+        )
+
+    def handle(self, *args, **options):
+        from core import jobs
+        self.jobs = jobs
+        self.worker = jobs.worker_name()
+        self.processes = options['processes']
+        self.pool = self.make_pool() if self.processes else None
+        self.running = {}
+        self.done = 0
+        recover_at = 0
+        try:
+            while True:
+                if time.monotonic() >= recover_at:
+                    jobs.recover_stale()
+                    jobs.purge_failed()
+                    recover_at = time.monotonic() + RECOVER_EVERY
+                claimed = self.submit()
+                if self.running:
+                    self.collect(options['poll'])
+                elif not claimed:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+        except KeyboardInterrupt:
+            self.stdout.write('Остановка: дожидаемся начатых задач')
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(wait=True)
+        self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {self.done}'))
+
+    def make_pool(self):
+        return ProcessPoolExecutor(
+            self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_process,
+        )
+
+    def submit(self):
+        """Забирает задачи на свободные процессы; возвращает их число."""
+        free = max(self.processes, 1) - len(self.running)
+        job_ids = self.jobs.claim(self.worker, free) if free > 0 else []
+        for job_id in job_ids:
+            if self.pool is None:
+                self.done += _run(job_id)
+            else:
+                self.running[self.pool.submit(_run, job_id)] = job_id
+        return len(job_ids)
+
+    def collect(self, timeout):
+        finished, _ = wait(
+            self.running, timeout=timeout, return_when=FIRST_COMPLETED
+        )
+        for future in finished:
+            job_id = self.running.pop(future)
+            try:
+                self.done += future.result()
+            except BrokenProcessPool:
+                # Задача останется взятой и через JOBS_TIMEOUT вернётся
+                # в очередь с засчитанной попыткой.
+                self.stderr.write(f'Процесс пула упал на задаче {job_id}')
+                self.pool.shutdown(wait=False)
+                self.pool = self.make_pool()
+                self.running = {}
+                return
+            except Exception as error:
+                self.stderr.write(f'Задача {job_id}: {error!r}')
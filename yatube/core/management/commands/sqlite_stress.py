@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sqlite_tuning import stress
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает SQLite с настройками по умолчанию и в режиме '
+        'SQLITE_PRAGMAS под одновременными записями и чтениями'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument(
+            '--operations', type=int, default=200,
+            help='Транзакций на каждого писателя',
+        )
+
+    def handle(self, *args, **options):
+        modes = (
+            ('По умолчанию', {}, 0),
+            ('Настроенный', settings.SQLITE_PRAGMAS,
+             settings.SQLITE_LOCK_RETRIES),
+        )
+        results = []
+        for _, pragmas, retries in modes:
+            # Каждый режим — на новом файле: WAL остаётся в файле базы.
+            with tempfile.TemporaryDirectory() as directory:
+                results.append(stress(
+                    os.path.join(directory, 'stress.sqlite3'), pragmas,
+                    options['writers'], options['readers'],
+                    options['operations'], retries,
+                ))
+        rows = (
+            ('Записей', 'writes', '{}'),
+            ('Чтений', 'reads', '{}'),
+            ('Ошибок', 'errors', '{}'),
+            ('Худшая задержка, мс', 'max_ms', '{:.1f}'),
+            ('Время, с', 'seconds', '{:.2f}'),
+        )
+        header = ''.join(f'{title:>14}' for title, _, _ in modes)
+        self.stdout.write(f'{"":<22}{header}')
+        for title, key, template in rows:
+            values = ''.join(
+                f'{template.format(result[key]):>14}' for result in results
+            )
+            self.stdout.write(f'{title:<22}{values}')
@@ -0,0 +1,31 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик из DB_REPLICAS: '
+        'локальная замена репликации'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'Команда только для SQLite: реплики других баз '
+                'обновляет их собственная репликация'
+            )
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не заданы: переменная DB_REPLICAS')
+        connection.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            name = settings.DATABASES[alias]['NAME']
+            target = sqlite3.connect(name)
+            try:
+                # Онлайн-копия: запись в основную базу не блокируется.
+                connection.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: {name}')
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import logging
+import time
+
+from django.utils.decorators import sync_and_async_middleware
+
+from . import db_router, performance
+
+logger = logging.getLogger('core.performance')
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else '<unresolved>'
+
+
+def _finish(request, response, stats, started):
+    total_ms = (time.perf_counter() - started) * 1000
+    view_name = _view_name(request)
+    performance.observe(view_name, total_ms)
+    response['Server-Timing'] = ', '.join((
+        f'db;dur={stats.sql_ms:.1f};desc="{stats.queries} queries"',
+        f'tpl;dur={stats.template_ms:.1f}',
+        f'cache;desc="{stats.cache_hits} hits, '
+        f'{stats.cache_misses} misses"',
+        f'total;dur={total_ms:.1f}',
+    ))
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'sql_queries': stats.queries,
+            'sql_ms': round(stats.sql_ms, 2),
+            'template_ms': round(stats.template_ms, 2),
+            'cache_hits': stats.cache_hits,
+            'cache_misses': stats.cache_misses,
+        }))
+    return response
+
+
+@sync_and_async_middleware
+def performance_middleware(get_response):
+    """
+    Замеры каждого запроса: SQL, шаблоны, кэш и имя представления.
+    Пишет заголовок Server-Timing и строку лога в JSON, а время ответа
+    добавляет в гистограмму представления (см. core/performance.py).
+    Стоит первым в MIDDLEWARE, чтобы видеть полное время запроса.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            stats, token = performance.start()
+            try:
+                response = await get_response(request)
+            finally:
+                performance.finish(token)
+            return _finish(request, response, stats, started)
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            stats, token = performance.start()
+            try:
+                response = get_response(request)
+            finally:
+                performance.finish(token)
+            return _finish(request, response, stats, started)
+    return middleware
+
+
+@sync_and_async_middleware
+def replica_middleware(get_response):
+    """Маршрутизация чтений запроса по репликам (см. core/db_router.py)."""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            state, token = db_router.start(request)
+            try:
+                response = await get_response(request)
+            finally:
+                db_router.finish(token)
+            return db_router.mark_primary(response, state)
+    else:
+        def middleware(request):
+            state, token = db_router.start(request)
+            try:
+                response = get_response(request)
+            finally:
+                db_router.finish(token)
+            return db_router.mark_primary(response, state)
+    return middleware
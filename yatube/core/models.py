@@ -0,0 +1,57 @@
+from django.db import models
+from django.db.models import Q
+
+
+class Job(models.Model):
+    """Фоновая задача очереди core/jobs.py: вызов функции по пути
+    с аргументами в JSON."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    func = models.CharField('Функция', max_length=200)
+    args = models.JSONField('Аргументы', default=list)
+    kwargs = models.JSONField('Именованные аргументы', default=dict)
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    key = models.CharField(
+        'Ключ дедупликации', max_length=200, null=True, blank=True,
+    )
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=QUEUED,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Всего попыток')
+    run_at = models.DateTimeField('Не раньше')
+    locked_by = models.CharField(
+        'Взята воркером', max_length=64, blank=True, default='',
+    )
+    locked_at = models.DateTimeField('Взята', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        constraints = [
+            # В очереди не больше одной задачи с тем же ключом.
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=Q(status='queued'),
+                name='unique_queued_job_key',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at', 'id'],
+                name='job_claim_idx',
+            ),
+            models.Index(fields=['locked_by'], name='job_locked_by_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.func} #{self.pk}'
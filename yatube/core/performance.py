@@ -0,0 +1,196 @@
+"""
+Замеры производительности запросов.
+
+performance_middleware (core/middleware.py) заводит на время запроса
+объект RequestStats в contextvar, а сюда в него пишут:
+обёртка execute_wrapper на каждом соединении с базой — число и время
+SQL-запросов, шаблонный бэкенд DjangoTemplates — время рендеринга,
+кэш-бэкенды с CacheStatsMixin — попадания и промахи. Вне запроса
+обёртки ничего не делают, кроме чтения contextvar.
+
+Время ответа копится в гистограммах по имени представления в памяти
+процесса: интервалы растут в геометрической прогрессии, поэтому память
+не зависит от числа запросов, а перцентили считаются с точностью до
+шага сетки.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.template.backends import django as django_backend
+
+_current = ContextVar('request_stats', default=None)
+_missing = object()
+
+# Верхние границы интервалов гистограммы в мс: от 0.5 мс до ~2 минут
+# с шагом 10%.
+BUCKETS = tuple(0.5 * 1.1 ** step for step in range(131))
+PERCENTILES = (50, 95, 99)
+
+
+class RequestStats:
+    __slots__ = (
+        'queries', 'sql_ms', 'template_ms', 'cache_hits', 'cache_misses',
+        '_template_depth',
+    )
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._template_depth = 0
+
+
+def start():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper: время и число SQL-запросов текущего запроса."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_ms += (time.perf_counter() - started) * 1000
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Обработчик connection_created: обёртка на каждое соединение."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(context, request)
+        # Вложенный рендеринг уже учтён во внешнем.
+        stats._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats._template_depth -= 1
+            if not stats._template_depth:
+                stats.template_ms += (time.perf_counter() - started) * 1000
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Шаблонный бэкенд Django, который меряет время рендеринга."""
+
+    def from_string(self, template_code):
+        return Template(
+            super().from_string(template_code).template, self
+        )
+
+    def get_template(self, template_name):
+        return Template(
+            super().get_template(template_name).template, self
+        )
+
+
+class CacheStatsMixin:
+    """Считает попадания и промахи get и get_many кэш-бэкенда."""
+    _in_get_many = False
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        stats = _current.get()
+        if stats is not None and not self._in_get_many:
+            if value is _missing:
+                stats.cache_misses += 1
+            else:
+                stats.cache_hits += 1
+        return default if value is _missing else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        # BaseCache.get_many вызывает get: не считаем ключи дважды.
+        self._in_get_many = True
+        try:
+            values = super().get_many(keys, version)
+        finally:
+            self._in_get_many = False
+        stats = _current.get()
+        if stats is not None:
+            stats.cache_hits += len(values)
+            stats.cache_misses += len(keys) - len(values)
+        return values
+
+
+class InstrumentedLocMemCache(CacheStatsMixin, LocMemCache):
+    pass
+
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'sum_ms')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def add(self, duration_ms):
+        self.counts[bisect.bisect_left(BUCKETS, duration_ms)] += 1
+        self.total += 1
+        self.sum_ms += duration_ms
+
+    def percentile(self, percent):
+        """Верхняя граница интервала, в который попал перцентиль."""
+        rank = percent / 100 * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return BUCKETS[min(index, len(BUCKETS) - 1)]
+        return 0.0
+
+
+_histograms = {}
+_lock = threading.Lock()
+
+
+def observe(view_name, duration_ms):
+    with _lock:
+        histogram = _histograms.get(view_name)
+        if histogram is None:
+            histogram = _histograms[view_name] = Histogram()
+        histogram.add(duration_ms)
+
+
+def summary():
+    """Число запросов, среднее и перцентили времени по представлениям."""
+    with _lock:
+        return {
+            view_name: {
+                'count': histogram.total,
+                'mean_ms': round(histogram.sum_ms / histogram.total, 2),
+                **{
+                    f'p{percent}_ms': round(histogram.percentile(percent), 2)
+                    for percent in PERCENTILES
+                },
+            } for view_name, histogram in sorted(_histograms.items())
+        }
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
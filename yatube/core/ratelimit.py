@@ -0,0 +1,96 @@
+"""
+Ограничение частоты запросов, которые пишут в базу.
+
+Каждому ограничению из settings.RATELIMITS соответствует ведро токенов
+(token bucket): ёмкость burst, пополнение на burst токенов за period
+секунд. Ведро заводится на пользователя, а для анонимов — на IP-адрес,
+и хранится в кэше по умолчанию: с общим кэшем (CACHE_BACKEND=sqlite
+или сервер кэша) лимит один на все воркеры. Ведро — пара (токены,
+время), и размер записи не зависит от числа прошлых запросов.
+Запрос без токена получает 429 и Retry-After — через сколько секунд
+появится следующий токен.
+
+Чтение и запись ведра идут под короткой блокировкой cache.add на ключ
+ведра, иначе одновременные запросы одного клиента прочли бы одно
+и то же число токенов и получили бы в разы больше burst. Блокировка
+хранит случайный токен и снимается, только если он ещё в кэше: после
+LOCK_TIMEOUT её мог захватить другой запрос. Запрос, который не
+дождался блокировки за LOCK_WAIT секунд, получает 429: так долго ведро
+занято только при потоке запросов того же клиента.
+"""
+import math
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .views import too_many_requests
+
+PREFIX = 'ratelimit'
+# Блокировка ведра: сколько она живёт, если процесс упал, и сколько
+# её ждать.
+LOCK_TIMEOUT = 2
+LOCK_WAIT = 0.1
+
+
+def client_key(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{request.META.get(settings.RATELIMIT_IP_META, "")}'
+
+
+def take(request, name, now=None):
+    """Берёт токен из ведра запроса. Возвращает 0, если токен был,
+    иначе сколько секунд ждать следующего."""
+    burst, period = settings.RATELIMITS[name]
+    rate = burst / period
+    now = time.time() if now is None else now
+    key = f'{PREFIX}:{name}:{client_key(request)}'
+    lock_key = f'{key}:lock'
+    token = uuid.uuid4().hex
+    if not _lock(lock_key, token):
+        return 1 / rate
+    try:
+        tokens, updated = cache.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        # Через period секунд без запросов ведро снова полное: ключ
+        # не нужен.
+        cache.set(key, (tokens - 1, now), period)
+        return 0
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def _lock(lock_key, token):
+    deadline = time.monotonic() + LOCK_WAIT
+    pause = 0.001
+    while not cache.add(lock_key, token, LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(pause)
+        pause = min(pause * 2, 0.02)
+    return True
+
+
+def ratelimit(name, methods=('POST',)):
+    """Ограничивает представление лимитом settings.RATELIMITS[name];
+    methods=None — запросы любым методом."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLED and (
+                methods is None or request.method in methods
+            ):
+                wait = take(request, name)
+                if wait:
+                    response = too_many_requests(request)
+                    response['Retry-After'] = str(math.ceil(wait))
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
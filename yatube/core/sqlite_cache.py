@@ -0,0 +1,253 @@
+"""
+Общий для всех процессов кэш в файле SQLite и защита от «лавины»
+пересчётов при истечении кэша.
+
+SQLiteCache хранит записи в одном файле, поэтому все воркеры gunicorn
+видят одни и те же фрагменты и версии ключей, а для работы не нужен
+отдельный сервис. get_or_compute поверх любого бэкенда пересчитывает
+значение в одном процессе (single-flight): остальные в это время отдают
+устаревшее значение, а пересчёт начинается чуть раньше срока с
+вероятностью, растущей к концу жизни записи (probabilistic early expiry).
+"""
+import math
+import pickle
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .performance import CacheStatsMixin
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL
+);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires);
+"""
+CULL_EVERY = 100
+
+
+class SQLiteCache(CacheStatsMixin, BaseCache):
+    """Бэкенд кэша Django в файле SQLite (LOCATION — путь к файлу)."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _expiry(self, timeout):
+        # get_backend_timeout отдаёт абсолютный срок (или None — навсегда).
+        return self.get_backend_timeout(timeout)
+
+    def _write(self, sql, params):
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = db.execute(sql, params)
+            self._cull(db)
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return cursor.rowcount
+
+    def _cull(self, db):
+        # COUNT(*) обходит индекс, поэтому размер проверяется не на каждой
+        # записи, а раз в CULL_EVERY записей.
+        self._writes += 1
+        if self._writes % CULL_EVERY:
+            return
+        count = db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count <= self._max_entries:
+            return
+        db.execute('DELETE FROM cache WHERE expires < ?', (time.time(),))
+        if self._cull_frequency:
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return bool(self._write(
+            'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+            'expires = excluded.expires '
+            'WHERE cache.expires IS NOT NULL AND cache.expires < ?',
+            (key, pickle.dumps(value), self._expiry(timeout), time.time()),
+        ))
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._db.execute(
+            'SELECT value FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires >= ?)',
+            (key, time.time()),
+        ).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._write(
+            'INSERT OR REPLACE INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (key, pickle.dumps(value), self._expiry(timeout)),
+        )
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return bool(self._write(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires >= ?)',
+            (self._expiry(timeout), key, time.time()),
+        ))
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return bool(self._write('DELETE FROM cache WHERE key = ?', (key,)))
+
+    def has_key(self, key, version=None):
+        return self.get(key, self, version=version) is not self
+
+    def get_many(self, keys, version=None):
+        keys = {
+            self.make_and_validate_key(key, version=version): key
+            for key in keys
+        }
+        if not keys:
+            return {}
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._db.execute(
+            f'SELECT key, value FROM cache WHERE key IN ({placeholders}) '
+            'AND (expires IS NULL OR expires >= ?)',
+            (*keys, time.time()),
+        )
+        return {keys[key]: pickle.loads(value) for key, value in rows}
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self._expiry(timeout)
+        rows = [
+            (
+                self.make_and_validate_key(key, version=version),
+                pickle.dumps(value),
+                expires,
+            ) for key, value in data.items()
+        ]
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)',
+                rows,
+            )
+            self._cull(db)
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return []
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires >= ?)',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value), key),
+            )
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return value
+
+    def clear(self):
+        self._write('DELETE FROM cache', ())
+
+    def close(self, **kwargs):
+        # Соединение живёт в потоке и переиспользуется между запросами.
+        pass
+
+
+def get_or_compute(cache, key, compute, timeout, beta=1.0,
+                   lock_timeout=10, stale_time=None, wait=1.0):
+    """
+    Значение из кэша или результат compute() с защитой от лавины.
+
+    В кэше лежит (значение, время расчёта, мягкий срок). После мягкого
+    срока запись ещё stale_time секунд хранится как устаревшая. Пересчёт
+    начинается раньше мягкого срока с вероятностью по алгоритму XFetch
+    (beta задаёт раннюю готовность), и выполняет его только процесс,
+    захвативший блокировку; остальные отдают устаревшее значение.
+    Если значения нет совсем, они ждут его не дольше wait секунд,
+    а потом считают сами, не трогая чужую блокировку.
+    """
+    now = time.time()
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, soft_expiry = entry
+        early = delta * beta * -math.log(1.0 - random.random())
+        if now + early < soft_expiry:
+            return value
+    lock_key = f'{key}:lock'
+    token = uuid.uuid4().hex
+    locked = cache.add(lock_key, token, lock_timeout)
+    if not locked:
+        if entry is not None:
+            return entry[0]
+        deadline = now + wait
+        pause = 0.01
+        while time.time() < deadline:
+            time.sleep(min(pause, max(deadline - time.time(), 0)))
+            pause = min(pause * 2, 0.2)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+    try:
+        started = time.time()
+        value = compute()
+        delta = time.time() - started
+        if stale_time is None:
+            stale_time = timeout
+        cache.set(
+            key,
+            (value, delta, started + delta + timeout),
+            timeout + stale_time,
+        )
+        return value
+    finally:
+        # Блокировка снимается, только если она ещё своя: после
+        # lock_timeout её мог захватить другой процесс.
+        if locked and cache.get(lock_key) == token:
+            cache.delete(lock_key)
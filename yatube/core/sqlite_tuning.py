@@ -0,0 +1,164 @@
+"""
+Режим SQLite для нескольких процессов и потоков.
+
+По умолчанию SQLite пишет через журнал отката: пока пишущая транзакция
+фиксируется, читатели ждут, а при нескольких писателях запросы падают
+с «database is locked». configure_connection (обработчик
+connection_created) задаёт каждому соединению settings.SQLITE_PRAGMAS:
+WAL, в котором читатели не ждут писателя, synchronous=NORMAL (fsync
+только при checkpoint), busy_timeout, mmap и больший кэш страниц.
+
+Блокировку, которую не снял busy_timeout, повторяют с растущей паузой:
+отдельные запросы вне транзакции — обёртка retry_locked на соединении,
+транзакцию целиком — декоратор retry_on_lock на представлениях, которые
+пишут. Внутри транзакции запрос не повторяется: снимок чтения в ней
+уже устарел, и начинать надо с начала транзакции.
+"""
+import random
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+LOCKED = ('database is locked', 'database table is locked')
+
+
+def is_locked(error):
+    return any(message in str(error) for message in LOCKED)
+
+
+def apply_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+
+
+def call_with_retries(func, retries=None, delay=0.01):
+    """func() с повторами при блокировке базы; пауза растёт вдвое."""
+    if retries is None:
+        retries = settings.SQLITE_LOCK_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except (OperationalError, sqlite3.OperationalError) as error:
+            if attempt == retries or not is_locked(error):
+                raise
+        # Случайная добавка разводит повторы соседних писателей.
+        time.sleep(delay * 2 ** attempt * (1 + random.random()))
+
+
+def retry_locked(execute, sql, params, many, context):
+    """execute_wrapper: повтор запроса вне транзакции при блокировке."""
+    if context['connection'].in_atomic_block:
+        return execute(sql, params, many, context)
+    return call_with_retries(lambda: execute(sql, params, many, context))
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Обработчик connection_created: режим SQLite и повторы записей."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
+    if retry_locked not in connection.execute_wrappers:
+        connection.execute_wrappers.append(retry_locked)
+
+
+def retry_on_lock(view):
+    """Повторяет представление целиком, если его транзакцию
+    не удалось зафиксировать из-за блокировки SQLite."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if connection.vendor != 'sqlite' or connection.in_atomic_block:
+            return view(*args, **kwargs)
+        return call_with_retries(lambda: view(*args, **kwargs))
+    return wrapper
+
+
+def stress(path, pragmas, writers=4, readers=4, operations=200, retries=0):
+    """
+    Нагрузка на файл SQLite: writers потоков вставляют по operations
+    строк в отдельных транзакциях, пока readers потоков читают.
+    Возвращает число записей, чтений, ошибок, худшую задержку (мс)
+    и время прогона (с).
+    """
+    with sqlite3.connect(path) as db:
+        apply_pragmas(db, pragmas)
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS stress '
+            '(id INTEGER PRIMARY KEY, worker INTEGER, payload TEXT)'
+        )
+    stats = {'writes': 0, 'reads': 0, 'errors': 0, 'max_ms': 0.0}
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def record(key, started):
+        with lock:
+            stats[key] += 1
+            stats['max_ms'] = max(
+                stats['max_ms'], (time.perf_counter() - started) * 1000
+            )
+
+    def write(db, worker):
+        db.execute('BEGIN')
+        try:
+            # Чтение перед записью, как у get_or_create и счётчиков:
+            # транзакция, начатая чтением, не ждёт блокировку записи,
+            # а сразу получает «database is locked».
+            db.execute('SELECT MAX(id) FROM stress').fetchone()
+            db.execute(
+                'INSERT INTO stress (worker, payload) VALUES (?, ?)',
+                (worker, 'x' * 200),
+            )
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+    def writer(worker):
+        db = sqlite3.connect(path, isolation_level=None)
+        apply_pragmas(db, pragmas)
+        for _ in range(operations):
+            started = time.perf_counter()
+            try:
+                call_with_retries(lambda: write(db, worker), retries)
+            except sqlite3.OperationalError:
+                with lock:
+                    stats['errors'] += 1
+            else:
+                record('writes', started)
+        db.close()
+
+    def reader():
+        db = sqlite3.connect(path, isolation_level=None)
+        apply_pragmas(db, pragmas)
+        while not done.is_set():
+            started = time.perf_counter()
+            try:
+                db.execute(
+                    'SELECT COUNT(*), MAX(id) FROM stress'
+                ).fetchone()
+            except sqlite3.OperationalError:
+                with lock:
+                    stats['errors'] += 1
+            else:
+                record('reads', started)
+        db.close()
+
+    threads = [
+        threading.Thread(target=writer, args=(number,))
+        for number in range(writers)
+    ]
+    reading = [threading.Thread(target=reader) for _ in range(readers)]
+    started = time.perf_counter()
+    for thread in threads + reading:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    for thread in reading:
+        thread.join()
+    stats['seconds'] = time.perf_counter() - started
+    return stats
@@ -0,0 +1,210 @@
+"""
+Сборка статики для продакшена.
+
+ProductionStaticFilesStorage — ManifestStaticFilesStorage, который при
+collectstatic сначала вырезает из CSS из settings.STATIC_PURGE_CSS
+правила с классами и id, которых нет ни в шаблонах, ни в скриптах
+(settings.STATIC_PURGE_CONTENT), затем, как обычно, пишет копии с хэшем
+содержимого в имени и манифест, а рядом с каждым итоговым текстовым
+файлом кладёт сжатые копии .gz и, если установлен brotli, .br.
+Шаблоны получают имена с хэшем через {% static %}, поэтому файлы можно
+отдавать с Cache-Control: immutable на год, а gzip_static и brotli_static
+веб-сервера отдают готовые сжатые копии.
+"""
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli необязателен
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.json', '.xml', '.map')
+CONTENT_EXTENSIONS = ('.html', '.js', '.py', '.txt')
+SKIPPED_DIRS = {'tests', 'migrations', '__pycache__'}
+# Селекторы, чьи аргументы не требуют присутствия класса на странице.
+PSEUDO_ARGUMENTS = re.compile(r':(?:not|is|where|has)\([^()]*\)')
+ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+NAMES = re.compile(r'[.#](-?[_a-zA-Z][\w-]*)')
+TOKEN = re.compile(r'[\w-]+')
+GROUPING_RULES = ('media', 'supports', 'layer', 'container', 'document')
+
+
+def used_tokens(paths):
+    """Все слова из шаблонов, скриптов и модулей в каталогах paths,
+    кроме тестов и миграций."""
+    tokens = set()
+    for path in paths:
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [name for name in dirs if name not in SKIPPED_DIRS]
+            for name in files:
+                if name.endswith(CONTENT_EXTENSIONS):
+                    with open(
+                        os.path.join(root, name), encoding='utf-8',
+                        errors='ignore',
+                    ) as file:
+                        tokens.update(TOKEN.findall(file.read()))
+    return tokens
+
+
+def _skip(css, i):
+    """Индекс после строки или комментария с позиции i, иначе i."""
+    if css.startswith('/*', i):
+        end = css.find('*/', i + 2)
+        return len(css) if end < 0 else end + 2
+    quote = css[i]
+    if quote in '"\'':
+        i += 1
+        while i < len(css) and css[i] != quote:
+            i += 2 if css[i] == '\\' else 1
+        return i + 1
+    return i
+
+
+def _find(css, i, chars):
+    """Первый из chars начиная с i вне строк и комментариев или -1."""
+    while i < len(css):
+        skipped = _skip(css, i)
+        if skipped != i:
+            i = skipped
+        elif css[i] == '\\':
+            i += 2
+        elif css[i] in chars:
+            return i
+        else:
+            i += 1
+    return -1
+
+
+def _closing(css, opening):
+    depth = 0
+    i = opening
+    while True:
+        i = _find(css, i, '{}')
+        if i < 0:
+            raise ValueError('Несбалансированные скобки в CSS')
+        depth += 1 if css[i] == '{' else -1
+        if not depth:
+            return i
+        i += 1
+
+
+def _split_selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for i, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and not depth:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return [selector.strip() for selector in selectors]
+
+
+def _is_used(selector, used):
+    plain = ATTRIBUTE.sub('', selector)
+    while True:
+        stripped = PSEUDO_ARGUMENTS.sub('', plain)
+        if stripped == plain:
+            break
+        plain = stripped
+    return all(name in used for name in NAMES.findall(plain))
+
+
+def purge_css(css, used):
+    """
+    CSS без правил, в селекторах которых есть классы или id не из used.
+    Правила без классов, @font-face, @keyframes и комментарии /*! ... */
+    с лицензией остаются; пустые @media и @supports убираются.
+    """
+    result = []
+    i = 0
+    while i < len(css):
+        if css[i].isspace():
+            i += 1
+            continue
+        if css.startswith('/*', i):
+            end = _skip(css, i)
+            if css.startswith('/*!', i):
+                result.append(css[i:end])
+            i = end
+            continue
+        brace = _find(css, i, '{;}')
+        if brace < 0:
+            result.append(css[i:])
+            break
+        if css[brace] == '}':
+            raise ValueError('Лишняя закрывающая скобка в CSS')
+        prelude = css[i:brace].strip()
+        if css[brace] == ';':
+            # @charset, @import, @namespace
+            result.append(css[i:brace + 1])
+            i = brace + 1
+            continue
+        closing = _closing(css, brace)
+        body = css[brace + 1:closing]
+        if prelude.startswith('@'):
+            name = re.match(r'@([\w-]+)', prelude).group(1).lower()
+            if name in GROUPING_RULES:
+                inner = purge_css(body, used)
+                if inner:
+                    result.append(f'{prelude}{{{inner}}}')
+            else:
+                result.append(css[i:closing + 1])
+        else:
+            selectors = [
+                selector for selector in _split_selectors(prelude)
+                if _is_used(selector, used)
+            ]
+            if selectors:
+                result.append(f'{",".join(selectors)}{{{body}}}')
+        i = closing + 1
+    return ''.join(result)
+
+
+class ProductionStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хэши в именах, очищенный Bootstrap и сжатые копии файлов."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        purge = set(getattr(settings, 'STATIC_PURGE_CSS', ()))
+        if purge & set(paths):
+            used = used_tokens(getattr(settings, 'STATIC_PURGE_CONTENT', ()))
+            for path in purge & set(paths):
+                self.purge(path, used)
+                # Хэш считается по очищенной копии, а не по исходнику.
+                paths[path] = (self, path)
+        yield from super().post_process(paths, dry_run, **options)
+        for name in {*paths, *self.hashed_files.values()}:
+            self.compress(name)
+
+    def purge(self, path, used):
+        with self.open(path) as file:
+            css = file.read().decode('utf-8')
+        self.delete(path)
+        self._save(path, ContentFile(purge_css(css, used).encode('utf-8')))
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE) or not self.exists(name):
+            return
+        with self.open(name) as file:
+            content = file.read()
+        compressors = {
+            '.gz': lambda data: gzip.compress(data, 9, mtime=0),
+        }
+        if brotli is not None:
+            compressors['.br'] = brotli.compress
+        for suffix, compress in compressors.items():
+            compressed = compress(content)
+            if len(compressed) < len(content):
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(compressed))
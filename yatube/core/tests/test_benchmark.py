@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from posts.models import Comment, Follow, Post
+
+from .. import benchmark
+
+User = get_user_model()
+
+
+class BenchmarkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        benchmark.seed(users=40, groups=3, posts=80, comments=120)
+
+    def test_seed_builds_power_law_graph(self):
+        """Данные созданы, подписчики сосредоточены у немногих авторов."""
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(Post.objects.count(), 80)
+        self.assertEqual(Comment.objects.count(), 120)
+        followers = sorted(
+            User.objects.values_list('stats__followers_count', flat=True),
+            reverse=True,
+        )
+        self.assertEqual(sum(followers), Follow.objects.count())
+        self.assertGreater(followers[0], 3 * followers[len(followers) // 2])
+
+    def test_measure_covers_every_route(self):
+        user = benchmark.reader()
+        client = Client()
+        client.force_login(user)
+        urls = benchmark.routes(benchmark.samples(user))
+        cache.set('site', 'запись сайта')
+        results = benchmark.measure(client, urls, repeats=1)
+        # Замеры чистят свой кэш, а не кэш сайта.
+        self.assertEqual(cache.get('site'), 'запись сайта')
+        self.assertIn('posts:index', results)
+        self.assertIn('about:tech', results)
+        self.assertEqual(len(results), len(urls))
+        for name, metrics in results.items():
+            with self.subTest(route=name):
+                self.assertLess(metrics['status'], 400)
+                self.assertGreater(metrics['queries'], 0)
+        self.assertGreater(results['posts:index']['rows'], 10)
+        self.assertEqual(Post.objects.count(), 80)
+
+    def test_compare_flags_regressions_over_threshold(self):
+        baseline = {'posts:index': {
+            'cold_ms': 20.0, 'warm_ms': 5.0, 'queries': 3, 'rows': 13,
+        }}
+        current = {'posts:index': {
+            'cold_ms': 40.0, 'warm_ms': 6.0, 'queries': 4, 'rows': 13,
+        }}
+        regressions = benchmark.compare(current, baseline, threshold=0.2)
+        self.assertEqual(
+            [item['metric'] for item in regressions], ['cold_ms', 'queries']
+        )
@@ -0,0 +1,111 @@
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from ..sqlite_cache import SQLiteCache, get_or_compute
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = str(Path(self.directory) / 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_basic_operations(self):
+        """set/get/add/incr/delete работают как у бэкендов Django."""
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertTrue(self.cache.add('new', 5))
+        self.assertEqual(self.cache.incr('new', 2), 7)
+        self.assertEqual(
+            self.cache.get_many(['key', 'new', 'missing']),
+            {'key': {'value': 1}, 'new': 7},
+        )
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_expired_entries_are_invisible_and_replaceable(self):
+        self.cache.set('key', 'value', 0.05)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'fresh'))
+        self.assertEqual(self.cache.get('key'), 'fresh')
+
+    def test_shared_between_instances(self):
+        """Другой процесс (экземпляр бэкенда) видит ту же запись."""
+        self.cache.set('version', 42)
+        other = SQLiteCache(self.location, {})
+        self.assertEqual(other.get('version'), 42)
+        other.delete('version')
+        self.assertIsNone(self.cache.get('version'))
+
+
+class GetOrComputeTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = LocMemCache('get-or-compute', {})
+        self.cache.clear()
+
+    def test_single_flight(self):
+        """Одновременные промахи пересчитывают значение один раз."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'page'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                get_or_compute(self.cache, 'page', compute, 60)
+            )) for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['page'] * 5)
+
+    def test_serves_stale_while_locked(self):
+        """Пока другой процесс пересчитывает, отдаётся прежнее значение."""
+        self.cache.set('page', ('old', 0.0, time.time() - 1), 60)
+        self.cache.add('page:lock', 1, 10)
+        value = get_or_compute(self.cache, 'page', lambda: 'new', 60)
+        self.assertEqual(value, 'old')
+
+    def test_waiter_keeps_owners_lock(self):
+        """Не дождавшись значения, запрос считает сам, но чужую
+        блокировку не снимает."""
+        self.cache.add('page:lock', 'owner', 10)
+        started = time.monotonic()
+        value = get_or_compute(
+            self.cache, 'page', lambda: 'new', 60, wait=0.1
+        )
+        self.assertEqual(value, 'new')
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.cache.get('page:lock'), 'owner')
+
+    def test_early_expiry_probability(self):
+        """Перед сроком запись иногда пересчитывается заранее."""
+        computed = 0
+
+        def compute():
+            nonlocal computed
+            computed += 1
+            return 'new'
+
+        for _ in range(200):
+            self.cache.set('page', ('old', 1.0, time.time() + 1.0), 60)
+            get_or_compute(self.cache, 'page', compute, 60)
+        self.assertGreater(computed, 0)
+        self.assertLess(computed, 200)
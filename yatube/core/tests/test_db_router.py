@@ -0,0 +1,189 @@
+import os
+import sqlite3
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import (
+    Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+from .. import db_router
+
+User = get_user_model()
+REPLICAS = ['replica_1', 'replica_2']
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = db_router.ReplicaRouter()
+        self.state = db_router.RoutingState()
+        self.token = db_router._current.set(self.state)
+        self.addCleanup(db_router._current.reset, self.token)
+
+    def test_reads_primary_outside_replica_views(self):
+        self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_replica_reads(self):
+        self.state.replica = True
+        self.assertIn(self.router.db_for_read(Post), REPLICAS)
+
+    def test_sessions_read_primary(self):
+        self.state.replica = True
+        self.assertIsNone(self.router.db_for_read(Session))
+
+    def test_reads_after_write_go_to_primary(self):
+        self.state.replica = True
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_no_migrations_on_replicas(self):
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'posts'))
+
+
+# Вместо реплики подставляется основная база: тест проверяет выбор
+# реплики роутером, а не содержимое второй базы.
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+@mock.patch.object(db_router.random, 'choice', return_value='default')
+class ReplicaRoutingViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_feeds_read_replica(self, choice):
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:index_rss'),
+        ):
+            with self.subTest(url=url):
+                choice.reset_mock()
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(choice.called)
+                self.assertNotIn(db_router.STICKY_COOKIE, response.cookies)
+
+    def test_write_sets_sticky_cookie(self, choice):
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'},
+        )
+        cookie = response.cookies[db_router.STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.PRIMARY_STICKY_SECONDS)
+        self.assertGreater(float(cookie.value), time.time())
+
+    def test_sticky_user_reads_primary(self, choice):
+        self.client.cookies[db_router.STICKY_COOKIE] = str(time.time() + 60)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        choice.assert_not_called()
+
+    def test_expired_cookie_reads_replica(self, choice):
+        self.client.cookies[db_router.STICKY_COOKIE] = str(time.time() - 1)
+        self.client.get(reverse('posts:index'))
+        self.assertTrue(choice.called)
+
+
+# Резервная копия SQLite ждёт конца открытой транзакции TestCase.
+class SyncReplicasTest(TransactionTestCase):
+    def test_copies_primary(self):
+        Post.objects.create(
+            author=User.objects.create_user(username='author'), text='Пост'
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            name = os.path.join(directory, 'replica.sqlite3')
+            with override_settings(DATABASE_REPLICAS=['replica_1']), \
+                    mock.patch.dict(
+                        settings.DATABASES, {'replica_1': {'NAME': name}}
+                    ):
+                call_command('sync_replicas', stdout=StringIO())
+            replica = sqlite3.connect(name)
+            try:
+                texts = replica.execute(
+                    'SELECT text FROM posts_post'
+                ).fetchall()
+            finally:
+                replica.close()
+        self.assertEqual(texts, [('Пост',)])
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class LaggingReplicaTest(TransactionTestCase):
+    """
+    Автор правит пост, а реплика ещё не получила правку: другой
+    пользователь сразу после этого не должен получить и закэшировать
+    старый текст под новой версией.
+    """
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(author=self.author, text='Старый')
+        Follow.objects.create(user=self.reader, author=self.author)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        name = os.path.join(directory.name, 'replica.sqlite3')
+        with mock.patch.dict(
+            settings.DATABASES, {'replica_1': {'NAME': name}}
+        ):
+            call_command('sync_replicas', stdout=StringIO())
+        connections.settings['replica_1'] = {
+            **connections.settings['default'], 'NAME': name,
+        }
+        self.addCleanup(self.drop_replica)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def drop_replica(self):
+        connections['replica_1'].close()
+        del connections['replica_1']
+        del connections.settings['replica_1']
+
+    def test_reader_after_other_users_write(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:follow_index'),
+            reverse('posts:index_rss'),
+        )
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        self.post.text = 'Новый'
+        self.post.save()
+        self.assertEqual(
+            Post.objects.using('replica_1').get().text, 'Старый'
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Новый')
+                self.assertNotContains(response, 'Старый')
+                # Повторный запрос получает из кэша то же самое.
+                self.assertContains(self.client.get(url), 'Новый')
@@ -0,0 +1,170 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import jobs
+from ..models import Job
+
+User = get_user_model()
+calls = []
+
+
+def record(*args, **kwargs):
+    calls.append((args, kwargs))
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+@override_settings(JOBS_EAGER=False, JOBS_MAX_ATTEMPTS=3, JOBS_BACKOFF=10)
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        job = jobs.enqueue(record, args=(1, 'два'), kwargs={'three': 3})
+        self.assertEqual(job.func, 'core.tests.test_jobs.record')
+        self.assertEqual(jobs.claim('worker', 10), [job.pk])
+        self.assertTrue(jobs.run(job.pk))
+        self.assertEqual(calls, [((1, 'два'), {'three': 3})])
+        self.assertFalse(Job.objects.exists())
+
+    def test_deduplication_key(self):
+        first = jobs.enqueue(record, args=(1,), key='post:1')
+        self.assertEqual(jobs.enqueue(record, args=(2,), key='post:1'), first)
+        self.assertEqual(Job.objects.count(), 1)
+        # Взятая воркером задача уже не прикрывает новую: данные могли
+        # измениться после её начала.
+        jobs.claim('worker', 1)
+        second = jobs.enqueue(record, args=(3,), key='post:1')
+        self.assertNotEqual(second, first)
+
+    def test_deduplication_key_claimed_meanwhile(self):
+        """Задачу с тем же key забрал воркер между неудачной вставкой
+        и её поиском: новая задача всё равно ставится."""
+        first = jobs.enqueue(record, key='post:1')
+        filter_ = Job.objects.filter
+
+        def claim_first(*args, **kwargs):
+            Job.objects.all().filter(pk=first.pk).update(status=Job.RUNNING)
+            return filter_(*args, **kwargs)
+
+        with mock.patch.object(Job.objects, 'filter', claim_first):
+            second = jobs.enqueue(record, args=(2,), key='post:1')
+        self.assertNotEqual(second, first)
+        self.assertEqual(
+            Job.objects.get(key='post:1', status=Job.QUEUED), second
+        )
+
+    def test_priority_and_delay(self):
+        low = jobs.enqueue(record, priority=jobs.LOW)
+        normal = jobs.enqueue(record)
+        high = jobs.enqueue(record, priority=jobs.HIGH)
+        jobs.enqueue(record, priority=jobs.HIGH, delay=60)
+        self.assertCountEqual(jobs.claim('worker', 2), [high.pk, normal.pk])
+        self.assertEqual(jobs.claim('worker', 10), [low.pk])
+        self.assertEqual(jobs.claim('worker', 10), [])
+
+    def test_retries_with_backoff(self):
+        job = jobs.enqueue(fail, args=('сломалось',))
+        for attempt in (1, 2):
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            jobs.claim('worker', 1)
+            started = timezone.now()
+            with self.assertLogs('core.jobs', 'ERROR'):
+                self.assertFalse(jobs.run(job.pk))
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.QUEUED)
+            self.assertEqual(job.attempts, attempt)
+            self.assertIn('сломалось', job.last_error)
+            delay = (job.run_at - started).total_seconds()
+            self.assertGreaterEqual(delay, 10 * 2 ** (attempt - 1) * 0.99)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.claim('worker', 1)
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.run(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 3)
+
+    @override_settings(JOBS_TIMEOUT=60)
+    def test_recover_stale(self):
+        stale = jobs.enqueue(record)
+        fresh = jobs.enqueue(record)
+        jobs.claim('dead', 1)
+        Job.objects.filter(pk=stale.pk).update(
+            locked_at=timezone.now() - timedelta(minutes=5)
+        )
+        jobs.claim('alive', 1)
+        self.assertEqual(jobs.recover_stale(), 1)
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            statuses, {stale.pk: Job.QUEUED, fresh.pk: Job.RUNNING}
+        )
+
+    def test_run_jobs_command(self):
+        for number in range(3):
+            jobs.enqueue(record, args=(number,))
+        out = StringIO()
+        call_command('run_jobs', processes=0, once=True, stdout=out)
+        self.assertCountEqual(
+            [args for args, _ in calls], [(0,), (1,), (2,)]
+        )
+        self.assertIn('Выполнено задач: 3', out.getvalue())
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_KEEP_FAILED=60)
+    def test_purge_failed(self):
+        old, fresh, queued = (jobs.enqueue(record) for _ in range(3))
+        Job.objects.filter(pk__in=[old.pk, fresh.pk]).update(
+            status=Job.FAILED
+        )
+        Job.objects.filter(pk__in=[old.pk, queued.pk]).update(
+            run_at=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertEqual(jobs.purge_failed(), 1)
+        self.assertCountEqual(
+            Job.objects.values_list('pk', flat=True), [fresh.pk, queued.pk]
+        )
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            jobs.enqueue(record, args=('сразу',))
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, [(('сразу',), {})])
+
+
+@override_settings(JOBS_EAGER=False)
+class PasswordResetEmailTest(TestCase):
+    def test_email_sent_by_worker(self):
+        User.objects.create_user(
+            username='user', email='user@example.com', password='secret'
+        )
+        response = Client().post(
+            reverse('users:password_reset_form'),
+            {'email': 'user@example.com'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(mail.outbox, [])
+        job = Job.objects.get()
+        self.assertEqual(job.func, 'users.mail.send_password_reset')
+        # Ни ссылки, ни токена в аргументах задачи нет.
+        self.assertEqual(
+            set(job.kwargs['context']), {'domain', 'site_name', 'protocol'}
+        )
+        call_command('run_jobs', processes=0, once=True, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ['user@example.com'])
+        link = message.body.split('http://testserver')[1].split()[0]
+        response = Client().get(link, follow=True)
+        self.assertContains(response, 'new_password1')
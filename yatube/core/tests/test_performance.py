@@ -0,0 +1,79 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import performance
+
+User = get_user_model()
+
+
+class PerformanceMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        performance.reset()
+
+    def test_server_timing_and_log_line(self):
+        """Заголовок и строка лога описывают SQL, шаблоны и кэш."""
+        with self.assertLogs('core.performance', 'INFO') as logs, \
+                CaptureQueriesContext(connection) as queries:
+            response = Client().get(reverse('posts:index'))
+        header = response['Server-Timing']
+        self.assertIn('db;dur=', header)
+        self.assertIn(f'"{len(queries)} queries"', header)
+        self.assertIn('tpl;dur=', header)
+        self.assertIn('total;dur=', header)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'posts:index')
+        self.assertEqual(line['status'], 200)
+        self.assertEqual(line['sql_queries'], len(queries))
+        self.assertGreater(line['template_ms'], 0)
+        self.assertGreater(line['cache_misses'], 0)
+
+        with self.assertLogs('core.performance', 'INFO') as logs:
+            Client().get(reverse('posts:index'))
+        line = json.loads(logs.records[0].getMessage())
+        self.assertGreater(line['cache_hits'], 0)
+        self.assertEqual(line['sql_queries'], 0)
+
+    async def test_async_requests_are_measured(self):
+        response = await AsyncClient().get(reverse('posts:index'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertEqual(performance.summary()['posts:index']['count'], 1)
+
+    def test_summary_is_staff_only(self):
+        for _ in range(3):
+            Client().get(reverse('posts:index'))
+        Client().get('/missing-page/')
+        url = reverse('performance')
+        self.assertEqual(Client().get(url).status_code, 302)
+        client = Client()
+        client.force_login(self.staff)
+        summary = client.get(url).json()
+        self.assertEqual(summary['posts:index']['count'], 3)
+        self.assertEqual(summary['<unresolved>']['count'], 1)
+        index = summary['posts:index']
+        self.assertLessEqual(index['p50_ms'], index['p95_ms'])
+        self.assertLessEqual(index['p95_ms'], index['p99_ms'])
+
+    def test_histogram_percentiles(self):
+        histogram = performance.Histogram()
+        for duration in range(1, 101):
+            histogram.add(duration)
+        for percent in performance.PERCENTILES:
+            with self.subTest(percent=percent):
+                self.assertAlmostEqual(
+                    histogram.percentile(percent), percent, delta=percent / 10
+                )
@@ -0,0 +1,160 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+from .. import ratelimit
+from ..performance import InstrumentedLocMemCache
+
+User = get_user_model()
+LIMITS = {
+    'post_create': (2, 60),
+    'comment': (2, 60),
+    'follow': (2, 60),
+    'signup': (1, 60),
+}
+
+
+@override_settings(RATELIMITS=LIMITS, RATELIMIT_ENABLED=True)
+class TokenBucketTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+        self.request.user = AnonymousUser()
+
+    def test_burst_then_wait(self):
+        self.assertEqual(ratelimit.take(self.request, 'comment', now=100), 0)
+        self.assertEqual(ratelimit.take(self.request, 'comment', now=100), 0)
+        # Два токена за 60 секунд: следующий через 30.
+        self.assertAlmostEqual(
+            ratelimit.take(self.request, 'comment', now=100), 30
+        )
+        self.assertAlmostEqual(
+            ratelimit.take(self.request, 'comment', now=120), 10
+        )
+        self.assertEqual(ratelimit.take(self.request, 'comment', now=130), 0)
+
+    def test_refill_is_capped(self):
+        ratelimit.take(self.request, 'comment', now=100)
+        for _ in range(2):
+            self.assertEqual(
+                ratelimit.take(self.request, 'comment', now=10_000), 0
+            )
+        self.assertGreater(
+            ratelimit.take(self.request, 'comment', now=10_000), 0
+        )
+
+    def test_buckets_by_ip_and_user(self):
+        other = RequestFactory().post('/', REMOTE_ADDR='10.0.0.2')
+        other.user = AnonymousUser()
+        user = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+        user.user = User(pk=1, username='user')
+        ratelimit.take(self.request, 'signup', now=100)
+        self.assertGreater(ratelimit.take(self.request, 'signup', now=100), 0)
+        self.assertEqual(ratelimit.take(other, 'signup', now=100), 0)
+        self.assertEqual(ratelimit.take(user, 'signup', now=100), 0)
+
+    def test_concurrent_requests_get_burst_only(self):
+        """Одновременные запросы одного клиента не берут больше burst."""
+        get = InstrumentedLocMemCache.get
+
+        def slow_get(cache, *args, **kwargs):
+            # Между чтением и записью ведра успевают другие потоки.
+            value = get(cache, *args, **kwargs)
+            time.sleep(0.005)
+            return value
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                ratelimit.take(self.request, 'follow')
+            )) for _ in range(10)
+        ]
+        with mock.patch.object(InstrumentedLocMemCache, 'get', slow_get):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results.count(0), 2)
+
+    def test_keeps_lock_taken_after_expiry(self):
+        """Истёкшую блокировку, которую уже взял другой запрос,
+        take не снимает."""
+        lock_key = f'{ratelimit.PREFIX}:follow:ip:10.0.0.1:lock'
+        set_ = InstrumentedLocMemCache.set
+
+        def expire_lock(cache, key, *args, **kwargs):
+            set_(cache, key, *args, **kwargs)
+            if key != lock_key:
+                # Пока ведро пишется, блокировка истекла и досталась
+                # другому запросу.
+                set_(cache, lock_key, 'other', ratelimit.LOCK_TIMEOUT)
+
+        with mock.patch.object(InstrumentedLocMemCache, 'set', expire_lock):
+            self.assertEqual(ratelimit.take(self.request, 'follow'), 0)
+        self.assertEqual(cache.get(lock_key), 'other')
+
+
+@override_settings(RATELIMITS=LIMITS, RATELIMIT_ENABLED=True)
+class RateLimitedViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def assertThrottled(self, response):
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_post_create(self):
+        url = reverse('posts:post_create')
+        for number in range(2):
+            response = self.client.post(url, {'text': f'Пост {number}'})
+            self.assertEqual(response.status_code, 302)
+        self.assertThrottled(self.client.post(url, {'text': 'Лишний'}))
+        self.assertFalse(Post.objects.filter(text='Лишний').exists())
+        # Форма открывается и без токенов.
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_comment_paths_share_limit(self):
+        data = {'text': 'Комментарий'}
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            data,
+        )
+        detail = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.client.post(detail, data)
+        self.assertThrottled(self.client.post(detail, data))
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_follow(self):
+        url = reverse('posts:profile_follow', kwargs={'username': 'author'})
+        for _ in range(2):
+            self.assertEqual(self.client.get(url).status_code, 302)
+        self.assertThrottled(self.client.get(url))
+
+    def test_signup_by_ip(self):
+        url = reverse('users:signup')
+        anonymous = Client(REMOTE_ADDR='10.0.0.3')
+        anonymous.post(url, {})
+        self.assertThrottled(anonymous.post(url, {}))
+        self.assertEqual(anonymous.get(url).status_code, 200)
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        url = reverse('posts:profile_follow', kwargs={'username': 'author'})
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, 302)
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .. import sqlite_tuning
+
+
+class SQLiteTuningTest(TestCase):
+    def test_connection_pragmas(self):
+        """Обработчик connection_created настроил соединение тестов."""
+        with connection.cursor() as cursor:
+            for name in ('busy_timeout', 'cache_size'):
+                with self.subTest(pragma=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    self.assertEqual(
+                        cursor.fetchone()[0], settings.SQLITE_PRAGMAS[name]
+                    )
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+        self.assertIn(sqlite_tuning.retry_locked, connection.execute_wrappers)
+
+    def test_wal_and_mmap_on_file(self):
+        """В памяти WAL и mmap не работают: проверка на файле."""
+        with tempfile.TemporaryDirectory() as directory:
+            db = sqlite3.connect(os.path.join(directory, 'db.sqlite3'))
+            sqlite_tuning.apply_pragmas(db, settings.SQLITE_PRAGMAS)
+            mode = db.execute('PRAGMA journal_mode').fetchone()[0]
+            mmap_size = db.execute('PRAGMA mmap_size').fetchone()[0]
+            db.close()
+        self.assertEqual(mode, 'wal')
+        self.assertEqual(mmap_size, settings.SQLITE_PRAGMAS['mmap_size'])
+
+
+@override_settings(SQLITE_LOCK_RETRIES=3)
+@mock.patch.object(sqlite_tuning.time, 'sleep')
+class RetryTest(SimpleTestCase):
+    def test_retries_locked(self, sleep):
+        func = mock.Mock(side_effect=[
+            OperationalError('database is locked'),
+            sqlite3.OperationalError('database is locked'),
+            'ok',
+        ])
+        self.assertEqual(sqlite_tuning.call_with_retries(func), 'ok')
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_gives_up(self, sleep):
+        func = mock.Mock(side_effect=OperationalError('database is locked'))
+        with self.assertRaises(OperationalError):
+            sqlite_tuning.call_with_retries(func)
+        self.assertEqual(func.call_count, 4)
+
+    def test_other_errors_not_retried(self, sleep):
+        func = mock.Mock(side_effect=OperationalError('no such table: x'))
+        with self.assertRaises(OperationalError):
+            sqlite_tuning.call_with_retries(func)
+        func.assert_called_once()
+
+    def test_view_retried_outside_transaction(self, sleep):
+        view = mock.Mock(side_effect=[
+            OperationalError('database is locked'), 'response',
+        ])
+        wrapped = sqlite_tuning.retry_on_lock(view)
+        self.assertEqual(wrapped('request'), 'response')
+        self.assertEqual(view.call_count, 2)
+
+    def test_statement_in_transaction_not_retried(self, sleep):
+        execute = mock.Mock(side_effect=OperationalError('database is locked'))
+        context = {'connection': mock.Mock(in_atomic_block=True)}
+        with self.assertRaises(OperationalError):
+            sqlite_tuning.retry_locked(execute, 'SQL', (), False, context)
+        execute.assert_called_once()
+
+
+class StressTest(SimpleTestCase):
+    def test_concurrent_writes_and_reads(self):
+        """Без настроек транзакции теряются на блокировках, в настроенном
+        режиме проходят все."""
+        results = {}
+        for mode, pragmas, retries in (
+            ('default', {}, 0),
+            ('tuned', settings.SQLITE_PRAGMAS, settings.SQLITE_LOCK_RETRIES),
+        ):
+            with tempfile.TemporaryDirectory() as directory:
+                results[mode] = sqlite_tuning.stress(
+                    os.path.join(directory, 'stress.sqlite3'), pragmas,
+                    writers=4, readers=4, operations=50, retries=retries,
+                )
+        tuned, default = results['tuned'], results['default']
+        self.assertEqual(tuned['errors'], 0)
+        self.assertEqual(tuned['writes'], 4 * 50)
+        self.assertGreater(tuned['reads'], 0)
+        self.assertGreaterEqual(default['writes'] + default['errors'], 200)
+        self.assertGreaterEqual(tuned['writes'], default['writes'])
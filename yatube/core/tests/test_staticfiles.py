@@ -0,0 +1,107 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from .. import staticfiles
+
+STATIC_ROOT = tempfile.mkdtemp()
+
+
+class PurgeCssTest(SimpleTestCase):
+    def test_drops_rules_with_unused_classes(self):
+        css = (
+            '@charset "UTF-8";/*! лицензия */:root{--x:1}'
+            'body{margin:0}.btn{color:red}.modal,.btn-primary{color:blue}'
+            '.modal{display:none}#main{width:1px}'
+            '.btn:not(.disabled):hover{color:green}'
+            'a[href=".modal"]{color:#000}'
+            '@media (min-width:576px){.modal{top:0}.btn{top:1px}}'
+            '@media print{.modal{top:0}}'
+            '@keyframes fade{from{opacity:0}to{opacity:1}}'
+            '.btn::after{content:"{.modal}"}'
+        )
+        purged = staticfiles.purge_css(css, {'btn', 'btn-primary'})
+        self.assertEqual(purged, (
+            '@charset "UTF-8";/*! лицензия */:root{--x:1}'
+            'body{margin:0}.btn{color:red}.btn-primary{color:blue}'
+            '.btn:not(.disabled):hover{color:green}'
+            'a[href=".modal"]{color:#000}'
+            '@media (min-width:576px){.btn{top:1px}}'
+            '@keyframes fade{from{opacity:0}to{opacity:1}}'
+            '.btn::after{content:"{.modal}"}'
+        ))
+
+    def test_unbalanced_css(self):
+        with self.assertRaises(ValueError):
+            staticfiles.purge_css('.btn{color:red', {'btn'})
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_STORAGE='core.staticfiles.ProductionStaticFilesStorage',
+)
+class CollectStaticTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(
+            os.path.join(STATIC_ROOT, 'staticfiles.json'), encoding='utf-8'
+        ) as file:
+            cls.manifest = json.load(file)['paths']
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def path(self, name):
+        return os.path.join(STATIC_ROOT, name)
+
+    def test_hashed_names_in_manifest(self):
+        for name in ('css/bootstrap.min.css', 'js/comments.js'):
+            with self.subTest(name=name):
+                hashed = self.manifest[name]
+                self.assertRegex(hashed, r'\.[0-9a-f]{12}\.(css|js)$')
+                self.assertTrue(os.path.exists(self.path(hashed)))
+
+    def test_bootstrap_is_purged(self):
+        source = os.path.join(
+            settings.BASE_DIR, 'static', 'css', 'bootstrap.min.css'
+        )
+        with open(self.path(self.manifest['css/bootstrap.min.css'])) as file:
+            purged = file.read()
+        self.assertLess(len(purged), os.path.getsize(source) / 2)
+        self.assertIn('.card{', purged)
+        self.assertNotIn('.carousel', purged)
+
+    def test_precompressed_copies(self):
+        hashed = self.path(self.manifest['css/bootstrap.min.css'])
+        with open(hashed, 'rb') as file, gzip.open(hashed + '.gz') as gz:
+            self.assertEqual(gz.read(), file.read())
+        self.assertFalse(os.path.exists(self.path('img/logo.png.gz')))
+
+    def test_pages_render_with_manifest(self):
+        # Строгий манифест роняет страницу, если {% static %} ссылается
+        # на файл, которого нет среди статики.
+        for url in ('/about/author/', '/auth/login/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(
+                    response, self.manifest['img/fav/favicon.ico']
+                )
+
+    @unittest.skipIf(staticfiles.brotli is None, 'brotli не установлен')
+    def test_brotli_copies(self):
+        hashed = self.path(self.manifest['css/bootstrap.min.css'])
+        with open(hashed, 'rb') as file, open(hashed + '.br', 'rb') as br:
+            self.assertEqual(staticfiles.brotli.decompress(br.read()),
+                             file.read())
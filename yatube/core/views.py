@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from . import performance
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -13,5 +17,15 @@ def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
 
 
+def too_many_requests(request):
+    return render(request, 'core/429.html', status=429)
+
+
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def performance_summary(request):
+    """Перцентили времени ответа по представлениям этого процесса."""
+    return JsonResponse(performance.summary())
@@ -1,7 +1,11 @@
 from django.contrib import admin
 
+from . import search
 from .models import Comment, Group, Post
 
+# Столько лучших совпадений полнотекстового поиска показывает админка
+ADMIN_SEARCH_LIMIT = 1000
+
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
@@ -17,6 +21,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по полнотекстовому индексу вместо icontains."""
+        if not search_term:
+            return queryset, False
+        post_ids = search.search_post_ids(search_term, ADMIN_SEARCH_LIMIT)
+        return queryset.filter(pk__in=post_ids), False
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
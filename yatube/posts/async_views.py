@@ -0,0 +1,159 @@
+"""
+Асинхронные версии лент и страницы поста для запуска под ASGI.
+
+Данные страницы загружаются асинхронным ORM, а независимые запросы
+(например, автор, подписка и страница постов в профиле) ставятся
+вместе через asyncio.gather. Пока запрос ждёт базу или медленного
+клиента, цикл событий обслуживает другие соединения, поэтому один
+ASGI-воркер держит много читателей, не занимая на каждого свой поток.
+В Django 4.1 сами SQL-запросы асинхронный ORM выполняет по очереди
+в общем потоке, так что gather пока экономит только переключения.
+
+Страницы общей ленты, лент групп и авторов остаются ленивыми, как
+в синхронных представлениях: их шаблоны собраны из кэша фрагментов,
+и посты запрашиваются при рендеринге только при промахе кэша. Лента
+подписок и комментарии загружаются заранее — их выводит каждый запрос.
+
+Включаются настройкой ASYNC_VIEWS=True, по умолчанию выключены и под
+ASGI: в замерах compare_handlers они пока медленнее синхронных.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+
+from core.db_router import replica_reads
+
+from . import conditional, counters, timeline
+from .forms import CommentForm
+from .models import Follow, Group, Post, User
+from .utls import _add_paginator_page
+from .views import PostDetailView, comments_page
+
+arender = sync_to_async(render)
+_sync_post_detail = sync_to_async(PostDetailView.as_view())
+
+
+@sync_to_async
+def aget_user(request):
+    """Вычисляет ленивый request.user в потоке: он читает сессию из базы."""
+    user = request.user
+    user.is_authenticated
+    return user
+
+
+def _lazy_page(request, queryset):
+    """Страница ленты, которую запросит шаблон, если её нет в кэше."""
+    return _add_paginator_page(request, queryset)
+
+
+async def _page(request, queryset, fields=('pub_date', 'id'), item=None):
+    page = _add_paginator_page(request, queryset, fields=fields, item=item)
+    return await page.aload()
+
+
+async def _get_or_404(queryset, **lookup):
+    try:
+        return await queryset.aget(**lookup)
+    except queryset.model.DoesNotExist:
+        raise Http404(
+            f'{queryset.model._meta.object_name} не найден'
+        )
+
+
+@replica_reads
+@conditional.condition(conditional.index)
+async def index(request):
+    """Домашния страница"""
+    page_obj = _lazy_page(
+        request, Post.objects.select_related('author', 'group')
+    )
+    return await arender(request, 'posts/index.html', {'page_obj': page_obj})
+
+
+@replica_reads
+@conditional.condition(conditional.group_list)
+async def group_posts(request, slug):
+    """Страница для групп"""
+    group = await Group.objects.filter(slug=slug).afirst()
+    if group is None:
+        raise Http404('Группа не найдена')
+    page_obj = _lazy_page(
+        request,
+        Post.objects.select_related('author', 'group').filter(group=group),
+    )
+    return await arender(
+        request,
+        'posts/group_list.html',
+        {'group': group, 'page_obj': page_obj},
+    )
+
+
+@replica_reads
+@conditional.condition(conditional.profile)
+async def profile(request, username):
+    """Профиль: автор и подписка запрашиваются вместе."""
+    user = await aget_user(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    author, following = await asyncio.gather(
+        _get_or_404(
+            User.objects.select_related('stats'), username=username
+        ),
+        Follow.objects.filter(
+            user=user, author__username=username
+        ).aexists(),
+    )
+    context = {
+        'author': author,
+        'following': following,
+        'stats': await counters.astats_for(author),
+        'page_obj': _lazy_page(
+            request,
+            Post.objects.select_related('author', 'group').filter(
+                author=author
+            ),
+        ),
+    }
+    return await arender(request, 'posts/profile.html', context)
+
+
+@replica_reads
+@conditional.condition(conditional.follow_index)
+async def follow_index(request):
+    """Лента подписок"""
+    user = await aget_user(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    post_list, fields, item = await timeline.afollow_feed(user)
+    page_obj = await _page(request, post_list, fields=fields, item=item)
+    return await arender(
+        request, 'posts/follow.html', {'page_obj': page_obj}
+    )
+
+
+@replica_reads
+@conditional.condition(conditional.post_detail)
+async def post_detail(request, post_id):
+    """Страница поста: пост и комментарии запрашиваются вместе."""
+    if request.method != 'GET':
+        # Отправка формы комментария остаётся синхронной.
+        return await _sync_post_detail(request, post_id=post_id)
+    await aget_user(request)
+    post, comments = await asyncio.gather(
+        _get_or_404(
+            Post.objects.select_related('author__stats', 'group'),
+            pk=post_id,
+        ),
+        comments_page(request, post_id).aload(),
+    )
+    stats = await counters.astats_for(post.author)
+    context = {
+        'post': post,
+        'count_post_author': stats.posts_count,
+        'form': CommentForm(),
+        'comments': comments,
+    }
+    return await arender(request, 'posts/post_detail.html', context)
@@ -0,0 +1,116 @@
+"""
+Версии кэшированных фрагментов.
+
+Ленты кэшируются тегом {% fragment_cache %}, карточки постов — тегом
+{% post_cards %} пачкой на страницу, и у каждого фрагмента версия
+в ключе. Сигналы моделей меняют версию при изменении поста, комментария
+или группы, и следующий запрос собирает фрагмент заново, поэтому время
+жизни кэша можно держать долгим, не показывая устаревших постов.
+В версию карточки входят версии её поста, автора ('author_card')
+и группы ('group_card'): смена имени автора или названия группы
+сбрасывает только их карточки и ленты, в которых они выводятся.
+Версия — время изменения в наносекундах: если ключ версии вытеснен
+из кэша, новая версия не совпадёт ни с одной из прежних.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_PREFIX = 'fragment_version'
+
+
+def version_key(*parts):
+    return ':'.join(str(part) for part in (VERSION_PREFIX, *parts))
+
+
+def get_version(*parts):
+    """
+    Версия фрагмента вместе с общей версией всех лент 'feeds',
+    которая меняется после загрузки дампа и удаления группы.
+    Обе версии читаются одним запросом к кэшу.
+    """
+    keys = (version_key('feeds'), version_key(*parts))
+    versions = _get_many(keys)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def card_version_keys(post_id, author_id, group_id):
+    """Ключи версий, из которых складывается версия карточки поста."""
+    keys = [
+        version_key('feeds'),
+        version_key('post', post_id),
+        version_key('author_card', author_id),
+    ]
+    if group_id is not None:
+        keys.append(version_key('group_card', group_id))
+    return keys
+
+
+def get_card_versions(posts):
+    """
+    Версии карточек постов одним запросом к кэшу.
+    posts — тройки (id поста, id автора, id группы);
+    возвращает {id поста: версия}.
+    """
+    keys = {
+        post_id: card_version_keys(post_id, author_id, group_id)
+        for post_id, author_id, group_id in posts
+    }
+    versions = _get_many({key for parts in keys.values() for key in parts})
+    return {
+        post_id: '.'.join(str(versions[key]) for key in parts)
+        for post_id, parts in keys.items()
+    }
+
+
+def _get_many(keys):
+    """Версии по ключам; недостающие заводятся с текущим временем."""
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return versions
+
+
+def bump_version(*parts):
+    cache.set(version_key(*parts), time.time_ns(), None)
+
+
+def bump_post(post, previous_group_id=None):
+    """Сбрасывает ленты, в которые входит пост, и его карточку."""
+    keys = {
+        version_key('index'),
+        version_key('author', post.author_id),
+        version_key('post', post.pk),
+    }
+    for group_id in (post.group_id, previous_group_id):
+        if group_id is not None:
+            keys.add(version_key('group', group_id))
+    _bump_many(*keys)
+
+
+def bump_author(author_id, group_ids=()):
+    """Сбрасывает карточки автора и ленты, в которых они выводятся:
+    общую, его профиль и группы group_ids, где у него есть посты."""
+    _bump_many(
+        version_key('author_card', author_id),
+        version_key('author', author_id),
+        version_key('index'),
+        *(version_key('group', group_id) for group_id in group_ids),
+    )
+
+
+def bump_group(group_id, author_ids=()):
+    """Сбрасывает карточки постов группы и ленты, в которых они
+    выводятся: общую, ленту группы и профили авторов author_ids."""
+    _bump_many(
+        version_key('group_card', group_id),
+        version_key('group', group_id),
+        version_key('index'),
+        *(version_key('author', author_id) for author_id in author_ids),
+    )
+
+
+def _bump_many(*keys):
+    cache.set_many(dict.fromkeys(keys, time.time_ns()), None)
@@ -0,0 +1,151 @@
+"""
+Условные GET-запросы к HTML-страницам.
+
+Валидатор страницы дешевле самой страницы. Общая лента, ленты групп
+и авторов и так собираются из фрагментов по версиям кэша (caching.py),
+которые сигналы меняют при любой правке постов, групп и имён: ETag
+этих страниц строится из тех же версий без запросов постов. Страница
+поста и лента подписок зависят от данных, у которых версии нет, поэтому
+для них одним запросом читаются id и updated_at тех же записей, что
+выведет страница (тот же курсор и индекс, без join и загрузки полей).
+
+В ETag входят пользователь и адрес с параметрами: шапка и кнопки
+страницы зависят от того, кто её смотрит, а курсор — от адреса.
+Совпавший If-None-Match даёт 304, и представление не вызывается:
+ни основной выборки, ни рендеринга шаблона. Last-Modified
+не отправляется: дата не различала бы пользователей и версии кэша.
+"""
+import asyncio
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+
+from . import caching, timeline
+from .models import Comment, Follow, Group, Post, User
+from .utls import _add_paginator_page
+
+
+def make_etag(request, *parts):
+    digest = hashlib.md5(usedforsecurity=False)
+    for part in (request.user.pk, request.get_full_path(), *parts):
+        digest.update(repr(part).encode())
+        digest.update(b'\0')
+    return f'"{digest.hexdigest()}"'
+
+
+def _slice(request, queryset, fields=('pub_date', 'id'), per_page=None,
+           values=('id', 'updated_at')):
+    """Ключи и updated_at записей, которые выведет страница по курсору."""
+    page = _add_paginator_page(request, queryset, per_page, fields)
+    return list(page._query().values_list(*values))
+
+
+def index(request):
+    return make_etag(request, caching.get_version('index'))
+
+
+def group_list(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return None
+    return make_etag(request, caching.get_version('group', group_id))
+
+
+def profile(request, username):
+    if not request.user.is_authenticated:
+        return None
+    # Счётчики подписок выводятся в шапке профиля, а версию кэша автора
+    # чужие подписки не меняют.
+    author = User.objects.filter(username=username).values_list(
+        'pk', 'stats__followers_count', 'stats__following_count'
+    ).first()
+    if author is None:
+        return None
+    author_id, *follow_counts = author
+    following = Follow.objects.filter(
+        user=request.user, author_id=author_id
+    ).exists()
+    return make_etag(
+        request, following, follow_counts,
+        caching.get_version('author', author_id),
+    )
+
+
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return None
+    post_list, fields, item = timeline.follow_feed(request.user)
+    if item is None:
+        values = ('id', 'updated_at')
+    else:
+        values = ('post_id', 'post__updated_at')
+    rows = _slice(request, post_list, fields, values=values)
+    # Посты ленты подписок входят и в общую ленту: её версия меняется
+    # при любой правке поста.
+    return make_etag(request, rows, caching.get_version('index'))
+
+
+def post_detail(request, post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'updated_at', 'author__stats__posts_count', 'author_id', 'group_id'
+    ).first()
+    if post is None:
+        return None
+    comments = _slice(
+        request, Comment.objects.filter(post_id=post_id),
+        ('created', 'id'), settings.COUNT_COMMENT_PAGE,
+    )
+    # Имя автора и группа поста выводятся на странице: версия та же,
+    # что у карточки.
+    version = caching.get_card_versions([(post_id, *post[2:])])[post_id]
+    return make_etag(request, post, comments, version)
+
+
+def _not_modified(request, etag):
+    if etag is None:
+        return None
+    return get_conditional_response(request, etag=etag)
+
+
+def _set_etag(response, etag):
+    if etag is not None and response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+    return response
+
+
+def condition(validator):
+    """
+    Как django.views.decorators.http.condition(etag_func=...), но и для
+    асинхронных представлений. validator(request, *args, **kwargs)
+    возвращает ETag или None, если страница без валидатора.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            avalidator = sync_to_async(validator)
+
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                etag = None
+                if request.method in ('GET', 'HEAD'):
+                    etag = await avalidator(request, *args, **kwargs)
+                response = _not_modified(request, etag)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _set_etag(response, etag)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                etag = None
+                if request.method in ('GET', 'HEAD'):
+                    etag = validator(request, *args, **kwargs)
+                response = _not_modified(request, etag)
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                return _set_etag(response, etag)
+        return wrapper
+    return decorator
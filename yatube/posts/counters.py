@@ -0,0 +1,96 @@
+"""
+Денормализованные счётчики: посты автора и группы, комментарии поста,
+подписчики и подписки пользователя.
+
+Счётчики меняются одним UPDATE ... SET n = n + 1 из сигналов моделей
+(см. posts/signals.py), а команда recount_counters исправляет
+накопившееся расхождение массовыми UPDATE с подзапросами.
+"""
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Group, Post, UserStats
+
+
+def _bump(queryset, deltas):
+    """Атомарно сдвигает счётчики; ниже нуля они не опускаются даже
+    при расхождении, которое потом исправит recount_counters."""
+    return queryset.update(**{
+        field: F(field) + delta if delta > 0 else Greatest(
+            F(field) + delta, 0
+        ) for field, delta in deltas.items()
+    })
+
+
+def bump_user(user_id, **deltas):
+    """Меняет счётчики пользователя, при необходимости создавая строку."""
+    stats = UserStats.objects.filter(user_id=user_id)
+    if _bump(stats, deltas) or min(deltas.values()) < 0:
+        return
+    UserStats.objects.get_or_create(user_id=user_id)
+    _bump(stats, deltas)
+
+
+def bump_group(group_id, delta):
+    if group_id is not None:
+        _bump(Group.objects.filter(pk=group_id), {'posts_count': delta})
+
+
+def bump_post(post_id, delta):
+    _bump(Post.objects.filter(pk=post_id), {'comments_count': delta})
+
+
+def stats_for(user):
+    """Счётчики пользователя; строка создаётся, если её ещё нет."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return UserStats.objects.get_or_create(user=user)[0]
+
+
+async def astats_for(user):
+    """stats_for для асинхронных представлений."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return (await UserStats.objects.aget_or_create(user=user))[0]
+
+
+def _count(model, field):
+    counted = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counted), 0, output_field=IntegerField())
+
+
+def reconcile(apps=global_apps):
+    """Пересчитывает все счётчики массовыми UPDATE."""
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+
+    UserStats.objects.bulk_create(
+        (
+            UserStats(user_id=user_id) for user_id in User.objects.filter(
+                stats__isnull=True
+            ).values_list('pk', flat=True)
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    Post.objects.update(comments_count=_count(Comment, 'post'))
+    Group.objects.update(posts_count=_count(Post, 'group'))
+    UserStats.objects.update(
+        posts_count=_count(Post, 'author'),
+        followers_count=_count(Follow, 'author'),
+        following_count=_count(Follow, 'user'),
+    )
@@ -0,0 +1,233 @@
+"""
+Потоковые загрузка и выгрузка фикстур в формате dumpdata.
+
+load() читает JSON-массив по кускам и разбирает объекты по одному,
+поэтому память не зависит от размера файла. Пользователи, группы,
+посты, комментарии и подписки пишутся через bulk_create пачками, каждая
+пачка — своя транзакция, после которой вызывается checkpoint с числом
+обработанных объектов: по нему прерванная загрузка продолжается.
+Сигналы при bulk_create не срабатывают, поэтому вторичные индексы
+снимаются на время загрузки, а счётчики, ленты подписок, поисковый
+индекс и версии кэша пересобираются один раз в конце.
+
+dump() пишет те же модели в том же формате, читая их .iterator().
+Связи многие-ко-многим пользователя (группы прав, разрешения) ссылаются
+на таблицы, которых нет в дампе, поэтому не выгружаются и не
+загружаются.
+"""
+import itertools
+import json
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from . import caching, counters, search, timeline
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 1000
+READ_SIZE = 64 * 1024
+# Самый большой объект фикстуры в символах: битый объект не должен
+# затягивать в буфер весь остаток файла.
+MAX_OBJECT_SIZE = 16 * 1024 * 1024
+SEPARATORS = ' \t\r\n,'
+
+
+def models():
+    """Модели дампа в порядке зависимостей, по меткам вида app.model."""
+    return {
+        settings.AUTH_USER_MODEL.lower(): User,
+        'posts.group': Group,
+        'posts.post': Post,
+        'posts.comment': Comment,
+        'posts.follow': Follow,
+    }
+
+
+def iter_objects(stream, read_size=READ_SIZE, max_size=MAX_OBJECT_SIZE):
+    """
+    Объекты JSON-массива из текстового потока по одному. Объект длиннее
+    max_size символов — ошибка со смещением его начала в потоке.
+    """
+    decoder = json.JSONDecoder()
+    # offset — смещение начала буфера от начала потока.
+    buffer, position, offset, opened = '', 0, 0, False
+    while True:
+        while position < len(buffer) and buffer[position] in SEPARATORS:
+            position += 1
+        if position == len(buffer):
+            chunk = stream.read(read_size)
+            if not chunk:
+                raise ValueError('Фикстура оборвалась до конца массива')
+            offset += len(buffer)
+            buffer, position = chunk, 0
+            continue
+        if not opened:
+            if buffer[position] != '[':
+                raise ValueError('Фикстура должна быть JSON-массивом')
+            opened = True
+            position += 1
+            continue
+        if buffer[position] == ']':
+            return
+        try:
+            obj, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as error:
+            # Объект не поместился в буфер целиком: дочитываем столько же,
+            # сколько уже прочитано, чтобы разборов было O(log n).
+            pending = len(buffer) - position
+            start = offset + position
+            if pending > max_size:
+                raise ValueError(
+                    f'Объект фикстуры на смещении {start} длиннее '
+                    f'{max_size} символов или испорчен'
+                ) from error
+            chunk = stream.read(max(read_size, pending))
+            if not chunk:
+                raise ValueError(
+                    f'Испорченный объект фикстуры на смещении {start}: '
+                    f'{error.msg}'
+                ) from error
+            offset += position
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield obj
+
+
+class DumpSerializer(serializers.get_serializer('json')):
+    """JSON dumpdata без связей многие-ко-многим."""
+
+    def handle_m2m_field(self, obj, field):
+        pass
+
+
+def _build(data):
+    # Связи многие-ко-многим из дампов других программ пропускаются.
+    return next(
+        serializers.deserialize('python', [data], ignorenonexistent=True)
+    ).object
+
+
+def _indexes(model):
+    with connection.cursor() as cursor:
+        existing = connection.introspection.get_constraints(
+            cursor, model._meta.db_table
+        )
+    return [
+        (index, index.name in existing) for index in model._meta.indexes
+    ]
+
+
+def _alter_indexes(drop):
+    # SQL берётся у schema_editor без входа в него: SQLite не даёт
+    # открыть редактор схемы внутри транзакции (например, в тестах).
+    editor = connection.schema_editor()
+    with connection.cursor() as cursor:
+        for model in models().values():
+            for index, exists in _indexes(model):
+                if drop and exists:
+                    cursor.execute(str(index.remove_sql(model, editor)))
+                elif not drop and not exists:
+                    cursor.execute(str(index.create_sql(model, editor)))
+
+
+def drop_indexes():
+    _alter_indexes(drop=True)
+
+
+def create_indexes():
+    _alter_indexes(drop=False)
+
+
+def rebuild_derived():
+    """Индексы, последовательности id и всё, что обычно ведут сигналы."""
+    create_indexes()
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), list(models().values())
+    )
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    counters.reconcile()
+    timeline.rebuild()
+    search.reindex()
+    caching.bump_version('feeds')
+
+
+@contextmanager
+def _stored_dates(models):
+    # bulk_create подставляет текущее время в поля auto_now и
+    # auto_now_add, а даты создания и правки должны остаться из дампа.
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def load(stream, batch_size=BATCH_SIZE, skip=0, checkpoint=None):
+    """
+    Загружает дамп, пропустив первые skip объектов. Строки с уже
+    существующим id пропускаются, поэтому пачку, прерванную на середине,
+    можно загрузить повторно. Возвращает число вставленных объектов
+    по моделям; объекты других моделей не загружаются.
+    """
+    labels = models()
+    loaded = Counter()
+    objects = itertools.islice(iter_objects(stream), skip, None)
+    consumed = skip
+    drop_indexes()
+    while True:
+        chunk = list(itertools.islice(objects, batch_size))
+        if not chunk:
+            break
+        pending = {model: [] for model in labels.values()}
+        for data in chunk:
+            model = labels.get(data.get('model', '').lower())
+            if model is not None:
+                pending[model].append(_build(data))
+        with transaction.atomic(), _stored_dates(pending):
+            for model, instances in pending.items():
+                if instances:
+                    loaded[model._meta.label_lower] += _insert(
+                        model, instances
+                    )
+        consumed += len(chunk)
+        if checkpoint is not None:
+            checkpoint(consumed)
+    rebuild_derived()
+    return loaded
+
+
+def _insert(model, instances):
+    """bulk_create без конфликтующих строк; возвращает число строк,
+    которые действительно вставлены, а не пропущены как существующие."""
+    stored = model.objects.filter(pk__in=[obj.pk for obj in instances])
+    before = stored.count()
+    model.objects.bulk_create(instances, ignore_conflicts=True)
+    return stored.count() - before
+
+
+def dump(stream, batch_size=BATCH_SIZE):
+    """Пишет модели дампа в stream, не загружая таблицы в память."""
+    querysets = [
+        model.objects.order_by('pk') for model in models().values()
+    ]
+    DumpSerializer().serialize(
+        itertools.chain.from_iterable(
+            queryset.iterator(chunk_size=batch_size)
+            for queryset in querysets
+        ),
+        stream=stream,
+    )
@@ -0,0 +1,103 @@
+"""
+Потоковая выгрузка постов автора в JSON Lines и CSV.
+
+Посты читаются пачками по ключу (pub_date, id): каждая пачка — отдельный
+короткий запрос «ключ меньше последнего выданного», прочитанный через
+.iterator(chunk_size=...), поэтому память и время одного запроса
+не зависят от числа постов, а длинная выгрузка не держит открытым
+курсор базы. Строки отдаются в StreamingHttpResponse по мере чтения.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .utls import CursorPaginator
+
+BATCH_SIZE = 1000
+FIELDS = (
+    'id', 'pub_date', 'text', 'group__slug', 'group__title',
+    'comments_count', 'image',
+)
+COLUMNS = (
+    'id', 'pub_date', 'text', 'group_slug', 'group_title',
+    'comments_count', 'image',
+)
+MEDIA_TYPES = {
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'text/csv': 'csv',
+}
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def negotiate(accept):
+    """Формат по заголовку Accept с учётом q; None — ничего не подходит."""
+    if not accept:
+        return 'jsonl'
+    choices = []
+    for position, item in enumerate(accept.split(',')):
+        media_type, *params = (part.strip() for part in item.split(';'))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type in ('*/*', 'application/*'):
+            export_format = 'jsonl'
+        else:
+            export_format = MEDIA_TYPES.get(media_type.lower())
+        if export_format and quality > 0:
+            choices.append((-quality, position, export_format))
+    return min(choices)[2] if choices else None
+
+
+def iter_posts(queryset, batch_size=BATCH_SIZE):
+    """Строки постов от новых к старым, пачками по ключу."""
+    paginator = CursorPaginator(
+        queryset.values(*FIELDS), batch_size, ('pub_date', 'id')
+    )
+    batch = paginator.ordered
+    while True:
+        count = 0
+        for post in batch[:batch_size].iterator(chunk_size=batch_size):
+            count += 1
+            yield post
+        if count < batch_size:
+            return
+        batch = paginator.filter_after([post['pub_date'], post['id']])
+
+
+def _row(post):
+    return [post[field] for field in FIELDS]
+
+
+def jsonl(posts):
+    for post in posts:
+        yield json.dumps(
+            dict(zip(COLUMNS, _row(post))),
+            cls=DjangoJSONEncoder, ensure_ascii=False,
+        ) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def csv_lines(posts):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for post in posts:
+        row = _row(post)
+        row[1] = row[1].isoformat()
+        yield writer.writerow(row)
+
+
+RENDERERS = {'jsonl': jsonl, 'csv': csv_lines}
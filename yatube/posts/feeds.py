@@ -0,0 +1,186 @@
+"""
+Ленты RSS и Atom: общая, групп и авторов.
+
+Читатели опрашивают ленты скриптами каждые несколько секунд, поэтому
+на запрос сначала выполняется один запрос по индексу ленты — самый
+новый пост (pub_date, id). Из него и версии кэша ленты (caching.py),
+которая меняется при правке и удалении постов, получаются ETag
+и Last-Modified. Совпавший If-None-Match или If-Modified-Since даёт 304,
+иначе тело берётся из кэша по ETag: лента генерируется заново только
+после изменения.
+"""
+from calendar import timegm
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.html import escape, linebreaks
+from django.utils.http import http_date
+from django.utils.text import Truncator
+
+from core.db_router import primary_reads, use_replica
+
+from . import caching
+from .models import Group, Post, User
+
+CACHE_PREFIX = 'feed'
+
+
+class PostsFeed(Feed):
+    """RSS последних постов сайта."""
+    feed_type = Rss201rev2Feed
+    title = 'Yatube: последние посты'
+    description = 'Последние обновления на сайте'
+    # Поле ленты в выборке самого нового поста и часть ключа её версии.
+    scope = None
+    version_name = 'index'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def latest(self, **kwargs):
+        """Посты ленты без загрузки объекта группы или автора."""
+        return Post.objects.all()
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj=None):
+        return self.posts(obj).select_related('author', 'group')[
+            :settings.COUNT_FEED_ITEMS
+        ]
+
+    def item_title(self, item):
+        return Truncator(item.text).words(settings.NUM_VERBS_STR)
+
+    def item_description(self, item):
+        return linebreaks(escape(item.text))
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return (item.group.title,) if item.group else ()
+
+    def validators(self, **kwargs):
+        """(ETag, Last-Modified) по самому новому посту ленты."""
+        fields = ('pub_date', 'id') + ((self.scope,) if self.scope else ())
+        latest = self.latest(**kwargs).order_by(
+            '-pub_date', '-id'
+        ).values_list(*fields).first()
+        if latest is None:
+            return None, None
+        pub_date, post_id, *scope = latest
+        last_modified = timegm(pub_date.utctimetuple())
+        version = caching.get_version(self.version_name, *scope)
+        etag = f'"{pub_date.timestamp():.6f}-{post_id}-{version}"'
+        return etag, last_modified
+
+    def __call__(self, request, *args, **kwargs):
+        use_replica(request)
+        etag, last_modified = self.validators(**kwargs)
+        if etag is None:
+            # Пустая лента или её нет вовсе: Feed ответит сам или 404.
+            return super().__call__(request, *args, **kwargs)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            key = f'{CACHE_PREFIX}:{request.path}:{etag}'
+            cached = cache.get(key)
+            if cached is None:
+                # Тело кэшируется по ETag с версией из основной базы.
+                with primary_reads():
+                    response = super().__call__(request, *args, **kwargs)
+                cache.set(
+                    key,
+                    (response['Content-Type'], response.content),
+                    settings.CACHE_TIME,
+                )
+            else:
+                content_type, content = cached
+                response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class GroupFeed(PostsFeed):
+    """RSS постов группы."""
+    scope = 'group_id'
+    version_name = 'group'
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', kwargs={'slug': group.slug})
+
+    def latest(self, slug):
+        return Post.objects.filter(group__slug=slug)
+
+    def posts(self, group):
+        return group.groups.all()
+
+
+class AuthorFeed(PostsFeed):
+    """RSS постов автора."""
+    scope = 'author_id'
+    version_name = 'author'
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Посты пользователя {author.username}'
+
+    def link(self, author):
+        return reverse(
+            'posts:profile', kwargs={'username': author.username}
+        )
+
+    def latest(self, username):
+        return Post.objects.filter(author__username=username)
+
+    def posts(self, author):
+        return author.post.all()
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj=None):
+        description = self.description
+        return description(obj) if callable(description) else description
+
+
+class PostsAtomFeed(AtomMixin, PostsFeed):
+    pass
+
+
+class GroupAtomFeed(AtomMixin, GroupFeed):
+    pass
+
+
+class AuthorAtomFeed(AtomMixin, AuthorFeed):
+    pass
@@ -1,5 +1,7 @@
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
 
+from .images import process_upload
 from .models import Comment, Post
 
 
@@ -8,6 +10,13 @@ class PostForm(ModelForm):
         super().__init__(*args, **kwargs)
         self.fields["group"].empty_label = "Группа не выбрана"
 
+    def clean_image(self):
+        """Новая картинка уменьшается и очищается от EXIF до сохранения."""
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            return process_upload(image)
+        return image
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
@@ -0,0 +1,123 @@
+"""
+Обработка загруженных картинок постов перед сохранением.
+
+Размеры проверяются по заголовку файла, до декодирования пикселей,
+JPEG декодируется сразу в уменьшенном масштабе (draft), картинка
+уменьшается до UPLOAD_MAX_SIDE по большей стороне, метаданные EXIF
+отбрасываются, а результат перекодируется во временный файл, который
+уходит на диск, как только перестаёт помещаться в небольшой буфер.
+Так пиковая память на запрос ограничена, а в media попадают уже
+уменьшенные файлы.
+
+Анимации GIF, WebP и APNG пересобираются так же, по кадрам, с прежними
+паузами и повтором; UPLOAD_MAX_PIXELS для них — предел на все кадры
+вместе.
+"""
+import os
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from PIL import Image, ImageOps, ImageSequence
+
+# Форматы, которые сохраняются как есть; остальные перекодируются в JPEG.
+KEPT_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+# Анимации этих форматов сохраняются анимацией, остальные — первым кадром.
+ANIMATED_FORMATS = {'PNG', 'GIF', 'WEBP'}
+SPOOL_SIZE = 1024 * 1024
+
+
+def _check_limits(upload, image):
+    if upload.size > settings.UPLOAD_MAX_BYTES:
+        raise ValidationError(
+            'Файл больше %(limit)s МБ',
+            code='file_too_large',
+            params={'limit': settings.UPLOAD_MAX_BYTES // (1024 * 1024)},
+        )
+    width, height = image.size
+    if width * height > settings.UPLOAD_MAX_PIXELS:
+        raise ValidationError(
+            'Слишком большое разрешение картинки: %(width)s×%(height)s',
+            code='too_many_pixels',
+            params={'width': width, 'height': height},
+        )
+    frames = getattr(image, 'n_frames', 1)
+    if width * height * frames > settings.UPLOAD_MAX_PIXELS:
+        raise ValidationError(
+            'Слишком длинная анимация: %(frames)s кадров '
+            '%(width)s×%(height)s',
+            code='too_many_frames',
+            params={'frames': frames, 'width': width, 'height': height},
+        )
+
+
+def _save_animation(image, name):
+    """Пересобирает анимацию по кадрам, уменьшая каждый кадр."""
+    max_side = settings.UPLOAD_MAX_SIDE
+    frames, durations = [], []
+    for frame in ImageSequence.Iterator(image):
+        # Длительность кадра WebP известна только после декодирования.
+        frame = frame.convert('RGBA')
+        durations.append(frame.info.get('duration', 100))
+        # Комментарий GIF и прочие поля info Pillow записал бы в файл.
+        frame.info.clear()
+        frame.thumbnail((max_side, max_side))
+        frames.append(frame)
+    options = {}
+    if image.format == 'WEBP':
+        options = {'quality': settings.UPLOAD_JPEG_QUALITY}
+    output = SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    frames[0].save(
+        output, format=image.format, save_all=True,
+        append_images=frames[1:], duration=durations,
+        loop=image.info.get('loop', 0), **options,
+    )
+    output.seek(0)
+    return File(output, name=name)
+
+
+def process_upload(upload):
+    """Возвращает уменьшенную картинку без EXIF для сохранения в Post.image."""
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError(
+            'Загрузите правильное изображение', code='invalid_image'
+        )
+    _check_limits(upload, image)
+    name = os.path.basename(upload.name)
+    source_format = image.format
+    if (
+        getattr(image, 'is_animated', False)
+        and source_format in ANIMATED_FORMATS
+    ):
+        return _save_animation(image, name)
+
+    max_side = settings.UPLOAD_MAX_SIDE
+    if source_format == 'JPEG':
+        image.draft('RGB', (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_side, max_side))
+
+    options = {}
+    if source_format in KEPT_FORMATS:
+        output_format = source_format
+    else:
+        output_format = 'JPEG'
+        name = f'{os.path.splitext(name)[0]}.jpg'
+    if output_format in ('JPEG', 'WEBP'):
+        options = {
+            'quality': settings.UPLOAD_JPEG_QUALITY, 'optimize': True
+        }
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+    elif output_format == 'PNG':
+        options = {'optimize': True}
+
+    output = SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    # Без параметра exif Pillow не переносит метаданные в новый файл.
+    image.save(output, format=output_format, **options)
+    output.seek(0)
+    return File(output, name=name)
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+
+MODES = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность лент под WSGI (синхронные '
+        'представления, пул потоков) и ASGI (асинхронные представления, '
+        'один цикл событий)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Адрес страницы; можно указать несколько раз',
+        )
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--concurrency', type=int, default=50,
+            help='Число одновременных читателей',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Потоков у WSGI-воркера',
+        )
+        parser.add_argument(
+            '--username', help='Читать страницы от имени пользователя',
+        )
+        parser.add_argument('--mode', choices=MODES, help='Один режим')
+
+    def handle(self, *args, **options):
+        options['paths'] = options['paths'] or ['/']
+        if options['mode']:
+            result = self.run_mode(options)
+            self.stdout.write(json.dumps(result))
+            return
+        # Режим выбирает представления при загрузке urls, поэтому каждый
+        # меряется в своём процессе, как в настоящем развёртывании.
+        results = [self.run_subprocess(mode, options) for mode in MODES]
+        self.print_table(results)
+
+    def run_subprocess(self, mode, options):
+        command = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'),
+            'compare_handlers', '--mode', mode,
+            '--requests', str(options['requests']),
+            '--concurrency', str(options['concurrency']),
+            '--threads', str(options['threads']),
+        ]
+        for path in options['paths']:
+            command += ['--path', path]
+        if options['username']:
+            command += ['--username', options['username']]
+        env = {
+            **os.environ,
+            'ASYNC_VIEWS': 'True' if mode == 'asgi' else 'False',
+        }
+        completed = subprocess.run(
+            command, env=env, capture_output=True, text=True
+        )
+        if completed.returncode:
+            raise CommandError(completed.stderr)
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def run_mode(self, options):
+        if (options['mode'] == 'asgi') != settings.ASYNC_VIEWS:
+            raise CommandError(
+                'ASYNC_VIEWS не соответствует режиму --mode'
+            )
+        # Тестовые клиенты ходят с заголовком Host: testserver.
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        cookies = None
+        if options['username']:
+            user = get_user_model().objects.get(
+                username=options['username']
+            )
+            client = Client()
+            client.force_login(user)
+            cookies = client.cookies
+        paths = options['paths']
+        total = options['requests']
+        run = self.run_wsgi if options['mode'] == 'wsgi' else self.run_asgi
+        started = time.perf_counter()
+        latencies, errors = run(paths, total, options, cookies)
+        elapsed = time.perf_counter() - started
+        quantiles = statistics.quantiles(latencies, n=100)
+        return {
+            'mode': options['mode'],
+            'requests': total,
+            'seconds': elapsed,
+            'rps': total / elapsed,
+            'p50_ms': quantiles[49] * 1000,
+            'p95_ms': quantiles[94] * 1000,
+            'errors': errors,
+        }
+
+    def run_wsgi(self, paths, total, options, cookies):
+        """Читатели ждут свободный поток, как у gunicorn --threads."""
+        workers = threading.Semaphore(options['threads'])
+        local = threading.local()
+
+        def fetch(number):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client()
+                if cookies is not None:
+                    client.cookies = cookies
+            started = time.perf_counter()
+            with workers:
+                response = client.get(paths[number % len(paths)])
+            return time.perf_counter() - started, response.status_code
+
+        with ThreadPoolExecutor(options['concurrency']) as readers:
+            results = list(readers.map(fetch, range(total)))
+        return self.split(results)
+
+    def run_asgi(self, paths, total, options, cookies):
+        """Все читатели обслуживаются одним циклом событий."""
+
+        async def reader(numbers, results):
+            client = AsyncClient()
+            if cookies is not None:
+                client.cookies = cookies
+            for number in numbers:
+                started = time.perf_counter()
+                response = await client.get(paths[number % len(paths)])
+                results.append(
+                    (time.perf_counter() - started, response.status_code)
+                )
+
+        async def main():
+            results = []
+            concurrency = options['concurrency']
+            await asyncio.gather(*(
+                reader(range(start, total, concurrency), results)
+                for start in range(concurrency)
+            ))
+            return results
+
+        return self.split(asyncio.run(main()))
+
+    @staticmethod
+    def split(results):
+        latencies = [latency for latency, _ in results]
+        errors = sum(1 for _, status in results if status >= 400)
+        return latencies, errors
+
+    def print_table(self, results):
+        rows = (
+            ('Запросов в секунду', 'rps', '{:.1f}'),
+            ('p50, мс', 'p50_ms', '{:.1f}'),
+            ('p95, мс', 'p95_ms', '{:.1f}'),
+            ('Ошибок', 'errors', '{}'),
+        )
+        self.stdout.write(f'{"":<20}{"WSGI":>12}{"ASGI":>12}')
+        for title, key, template in rows:
+            values = ''.join(
+                f'{template.format(result[key]):>12}' for result in results
+            )
+            self.stdout.write(f'{title:<20}{values}')
@@ -0,0 +1,29 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts import dumps
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии и подписки '
+        'в формате dumpdata, не загружая таблицы в память; связи '
+        'пользователей с группами прав и разрешениями не выгружаются'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o', help='Файл дампа; по умолчанию stdout',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=dumps.BATCH_SIZE,
+            help='Строк в одном запросе к базе',
+        )
+
+    def handle(self, *args, **options):
+        if not options['output']:
+            dumps.dump(sys.stdout, options['batch_size'])
+            return
+        with open(options['output'], 'w', encoding='utf-8') as stream:
+            dumps.dump(stream, options['batch_size'])
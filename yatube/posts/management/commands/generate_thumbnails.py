@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт недостающие миниатюры для уже загруженных картинок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.THUMBNAIL_WORKERS or 1,
+            help='Число потоков, создающих миниатюры',
+        )
+
+    def handle(self, *args, **options):
+        post_ids = (
+            Post.objects.exclude(image='')
+            .values_list('id', flat=True)
+            .iterator(chunk_size=1000)
+        )
+        if options['workers'] <= 1:
+            done = sum(1 for _ in map(thumbnails.generate, post_ids))
+        else:
+            with ThreadPoolExecutor(options['workers']) as executor:
+                done = sum(1 for _ in executor.map(
+                    thumbnails.generate_in_thread, post_ids
+                ))
+        self.stdout.write(
+            self.style.SUCCESS(f'Миниатюры готовы для постов: {done}')
+        )
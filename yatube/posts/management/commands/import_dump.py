@@ -0,0 +1,51 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand
+
+from posts import dumps
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает большой дамп dumpdata потоково, пачками bulk_create; '
+        'прерванную загрузку продолжает с места остановки и выводит, '
+        'сколько строк вставлено; связи многие-ко-многим не загружаются'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл дампа в формате JSON')
+        parser.add_argument(
+            '--batch-size', type=int, default=dumps.BATCH_SIZE,
+            help='Объектов в одной транзакции',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать сначала, не глядя на сохранённый прогресс',
+        )
+
+    def handle(self, *args, **options):
+        progress = f'{options["path"]}.progress'
+        skip = 0
+        if os.path.exists(progress) and not options['restart']:
+            with open(progress, encoding='utf-8') as file:
+                skip = json.load(file)['objects']
+            self.stdout.write(f'Продолжаю после объекта {skip}')
+
+        def checkpoint(consumed):
+            temporary = f'{progress}.tmp'
+            with open(temporary, 'w', encoding='utf-8') as file:
+                json.dump({'objects': consumed}, file)
+            os.replace(temporary, progress)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Обработано объектов: {consumed}')
+
+        with open(options['path'], encoding='utf-8') as stream:
+            loaded = dumps.load(
+                stream, options['batch_size'], skip, checkpoint
+            )
+        if os.path.exists(progress):
+            os.remove(progress)
+        for label, count in sorted(loaded.items()):
+            self.stdout.write(f'{label}: {count}')
+        self.stdout.write(self.style.SUCCESS('Дамп загружен'))
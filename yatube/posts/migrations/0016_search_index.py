@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from posts import search
+
+    search.create_schema(schema_editor)
+    search.reindex(apps)
+
+
+def drop_search_index(apps, schema_editor):
+    from posts import search
+
+    search.drop_schema(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.1 on 2026-10-18 15:41
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_creation_dates(apps, schema_editor):
+    """Прежние записи не правились: изменены тогда же, когда созданы."""
+    apps.get_model('posts', 'Post').objects.update(updated_at=F('pub_date'))
+    apps.get_model('posts', 'Comment').objects.update(
+        updated_at=F('created')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(copy_creation_dates, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 
 User = get_user_model()
 
@@ -14,6 +14,10 @@ class Post(models.Model):
         auto_now_add=True,
         verbose_name='Дата Публикации',
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -34,15 +38,39 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_feed_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_feed_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        """Сохраняет пост вместе со счётчиками в одной транзакции."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Group(models.Model):
     """Модель группы"""
@@ -59,6 +87,11 @@ class Group(models.Model):
         verbose_name='Описание',
         blank=True,
     )
+    posts_count = models.PositiveIntegerField(
+        'Число постов',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Группу'
@@ -84,12 +117,24 @@ class Comment(models.Model):
     )
     text = models.TextField(verbose_name='Текст комментария')
     created = models.DateTimeField("Дата публикации", auto_now_add=True)
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        """Сохраняет комментарий вместе со счётчиком в одной транзакции."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         ordering = ["-created"]
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_feed_idx',
+            ),
+        ]
 
 
 class Follow (models.Model):
@@ -114,3 +159,83 @@ class Follow (models.Model):
                 name='unique_follows'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Сохраняет подписку вместе со счётчиками в одной транзакции."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, поддерживаемые при изменениях постов
+    и подписок, чтобы не считать COUNT(*) на каждой странице"""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков', default=0
+    )
+    following_count = models.PositiveIntegerField('Число подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return f'Счётчики {self.user_id}'
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя.
+    Заполняется при публикации поста (fan-out on write),
+    дата публикации дублируется из поста ради индексного чтения ленты."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор поста',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата Публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_feed_idx',
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author_idx',
+            ),
+        ]
@@ -0,0 +1,172 @@
+"""
+Полнотекстовый поиск по постам и комментариям.
+
+Обратный индекс хранится в таблице posts_search: в SQLite это
+виртуальная таблица FTS5, в PostgreSQL — таблица с колонкой tsvector
+под GIN-индексом. Строка индекса для поста имеет id = 2 * post.id,
+для комментария — 2 * comment.id + 1, поэтому обновление и удаление
+идут по первичному ключу. Индекс обновляется сигналами при сохранении
+и удалении, а поиск возвращает id постов по убыванию релевантности.
+"""
+import re
+
+from django.apps import apps as global_apps
+from django.db import connection
+
+TABLE = 'posts_search'
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+BATCH_SIZE = 1000
+
+SQLITE_SCHEMA = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "text, post_id UNINDEXED, tokenize='unicode61 remove_diacritics 2')",
+)
+POSTGRES_SCHEMA = (
+    f'CREATE TABLE IF NOT EXISTS {TABLE} ('
+    'id bigint PRIMARY KEY, post_id bigint NOT NULL, '
+    'document tsvector NOT NULL)',
+    f'CREATE INDEX IF NOT EXISTS {TABLE}_document '
+    f'ON {TABLE} USING GIN (document)',
+    f'CREATE INDEX IF NOT EXISTS {TABLE}_post ON {TABLE} (post_id)',
+)
+POSTGRES_CONFIG = 'russian'
+
+
+def post_row_id(post_id):
+    return 2 * post_id
+
+
+def comment_row_id(comment_id):
+    return 2 * comment_id + 1
+
+
+def create_schema(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        statements = SQLITE_SCHEMA
+    elif vendor == 'postgresql':
+        statements = POSTGRES_SCHEMA
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_schema(schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+def _supported():
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def _upsert_many(rows):
+    """rows — (id строки индекса, id поста, текст)."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {TABLE} (rowid, post_id, text) '
+                'VALUES (%s, %s, %s)',
+                rows,
+            )
+        else:
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (id, post_id, document) '
+                f"VALUES (%s, %s, to_tsvector('{POSTGRES_CONFIG}', %s)) "
+                'ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document',
+                rows,
+            )
+
+
+def _upsert(row_id, post_id, text):
+    _upsert_many([(row_id, post_id, text)])
+
+
+def _delete(row_id):
+    column = 'rowid' if connection.vendor == 'sqlite' else 'id'
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE {column} = %s', [row_id])
+
+
+def index_post(post):
+    if _supported():
+        _upsert(post_row_id(post.pk), post.pk, post.text)
+
+
+def index_comment(comment):
+    if _supported():
+        _upsert(comment_row_id(comment.pk), comment.post_id, comment.text)
+
+
+def remove_post(post_id):
+    if _supported():
+        _delete(post_row_id(post_id))
+
+
+def remove_comment(comment_id):
+    if _supported():
+        _delete(comment_row_id(comment_id))
+
+
+def reindex(apps=global_apps):
+    """Строит индекс заново по всем постам и комментариям."""
+    if not _supported():
+        return
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+    posts = Post.objects.values_list('pk', 'text')
+    _reindex_rows(
+        (post_row_id(pk), pk, text) for pk, text in posts.iterator()
+    )
+    comments = Comment.objects.values_list('pk', 'post_id', 'text')
+    _reindex_rows(
+        (comment_row_id(pk), post_id, text)
+        for pk, post_id, text in comments.iterator()
+    )
+
+
+def _reindex_rows(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            _upsert_many(batch)
+            batch = []
+    if batch:
+        _upsert_many(batch)
+
+
+def _fts_query(query):
+    # Слова запроса в кавычках: синтаксис FTS5 из ввода не выполняется.
+    return ' '.join(f'"{word}"' for word in WORD_RE.findall(query))
+
+
+def search_post_ids(query, limit, offset=0):
+    """id постов, у которых текст или один из комментариев содержит
+    все слова запроса, по убыванию релевантности."""
+    if not _supported() or not WORD_RE.search(query or ''):
+        return []
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # rank — это bm25 строки; чем меньше, тем релевантнее.
+            cursor.execute(
+                'SELECT post_id, MIN(rank) AS score '
+                f'FROM {TABLE} WHERE {TABLE} MATCH %s '
+                'GROUP BY post_id ORDER BY score, post_id DESC '
+                'LIMIT %s OFFSET %s',
+                [_fts_query(query), limit, offset],
+            )
+        else:
+            cursor.execute(
+                'SELECT post_id, MAX(ts_rank(document, query)) AS score '
+                f'FROM {TABLE}, websearch_to_tsquery('
+                f"'{POSTGRES_CONFIG}', %s) query "
+                'WHERE document @@ query '
+                'GROUP BY post_id ORDER BY score DESC, post_id DESC '
+                'LIMIT %s OFFSET %s',
+                [query, limit, offset],
+            )
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,143 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, counters, search, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+# Поля пользователя, которые выводятся в карточках постов.
+NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    """У нового пользователя сразу появляются нулевые счётчики."""
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=User)
+def remember_user_name(sender, instance, raw=False, update_fields=None,
+                       **kwargs):
+    """Запоминает прежнее имя пользователя, если сохранение может
+    его изменить."""
+    instance._previous_name = None
+    if raw or instance._state.adding or not instance.pk:
+        return
+    if update_fields is not None and not set(update_fields) & set(NAME_FIELDS):
+        return
+    instance._previous_name = User.objects.filter(
+        pk=instance.pk
+    ).values_list(*NAME_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    """Имя автора выводится в карточках его постов, поэтому их и ленты
+    с ними сбрасывает только смена имени: не регистрация, вход или смена
+    пароля."""
+    previous = getattr(instance, '_previous_name', None)
+    if raw or created or previous is None:
+        return
+    if previous != tuple(getattr(instance, field) for field in NAME_FIELDS):
+        group_ids = Post.objects.filter(
+            author=instance, group__isnull=False
+        ).values_list('group_id', flat=True).distinct()
+        caching.bump_author(instance.pk, group_ids)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, raw=False, **kwargs):
+    """Название и адрес группы выводятся в карточках её постов."""
+    if not raw:
+        author_ids = Post.objects.filter(group=instance).values_list(
+            'author_id', flat=True
+        ).distinct()
+        caching.bump_group(instance.pk, author_ids)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    """Посты удалённой группы уже без группы, и по ним не найти
+    профили с её ссылками: удаление редкое, сбрасываются все ленты."""
+    caching.bump_version('feeds')
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_state(sender, instance, raw=False, **kwargs):
+    """Запоминает прежние группу и картинку поста, чтобы перенести
+    счётчик и пересоздать миниатюры."""
+    instance._previous_group_id = None
+    instance._previous_image = None
+    if not raw and not instance._state.adding and instance.pk:
+        instance._previous_group_id, instance._previous_image = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', 'image')
+            .first()
+        ) or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    """Новый пост попадает в ленты подписчиков и в счётчики,
+    при смене группы счётчик переходит в новую группу."""
+    if raw:
+        return
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    caching.bump_post(instance, previous_group_id)
+    search.index_post(instance)
+    if instance.image and instance.image.name != getattr(
+        instance, '_previous_image', None
+    ):
+        thumbnails.schedule(instance)
+    if created:
+        counters.bump_user(instance.author_id, posts_count=1)
+        counters.bump_group(instance.group_id, 1)
+        timeline.fan_out(instance)
+        return
+    if previous_group_id != instance.group_id:
+        counters.bump_group(previous_group_id, -1)
+        counters.bump_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    caching.bump_post(instance)
+    search.remove_post(instance.pk)
+    counters.bump_user(instance.author_id, posts_count=-1)
+    counters.bump_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_post(instance.post_id, 1)
+    if not raw:
+        caching.bump_version('post', instance.post_id)
+        search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_post(instance.post_id, -1)
+    caching.bump_version('post', instance.post_id)
+    search.remove_comment(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    """После подписки растут счётчики, а в ленту попадают
+    последние посты автора (остальные — фоновой задачей)."""
+    if created and not raw:
+        counters.bump_user(instance.author_id, followers_count=1)
+        counters.bump_user(instance.user_id, following_count=1)
+        timeline.follow_started(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """После отписки посты автора пропадают из ленты."""
+    counters.bump_user(instance.author_id, followers_count=-1)
+    counters.bump_user(instance.user_id, following_count=-1)
+    timeline.follow_ended(instance.user_id, instance.author_id)
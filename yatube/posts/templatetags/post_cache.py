@@ -0,0 +1,134 @@
+from django import template
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db import DEFAULT_DB_ALIAS
+from django.templatetags.cache import CacheNode
+from django.utils.safestring import mark_safe
+
+from core.db_router import primary_reads
+from core.sqlite_cache import get_or_compute
+from posts.caching import get_card_versions, get_version
+from posts.models import Post
+
+CARD_TEMPLATE = 'includes/post_card.html'
+CARD_SEPARATOR = '\n<hr>\n'
+
+register = template.Library()
+
+
+@register.simple_tag
+def cache_version(*parts):
+    """Текущая версия фрагмента для ключа тега {% fragment_cache %}."""
+    return get_version(*parts)
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, group=None):
+    """
+    Карточки постов страницы из кэша: версии и готовые карточки читаются
+    двумя get_many на всю страницу, шаблон рендерится только для
+    карточек, которых в кэше нет. Версия карточки меняется при правке
+    поста, его группы и имени его автора (caching.py).
+    group — группа страницы: на её странице ссылки на группу нет.
+    Посты, прочитанные с реплики, для недостающих карточек перечитываются
+    из основной базы: реплика могла не получить правку, сменившую версию.
+
+        {% post_cards page_obj group %}
+    """
+    posts = list(posts)
+    if not posts:
+        return ''
+    cache = caches['default']
+    group_pk = getattr(group, 'pk', None)
+    versions = get_card_versions(
+        (post.pk, post.author_id, post.group_id) for post in posts
+    )
+    keys = {
+        post.pk: make_template_fragment_key(
+            'post_card', [post.pk, versions[post.pk], group_pk]
+        ) for post in posts
+    }
+    cards = cache.get_many(keys.values())
+    missing = [post for post in posts if keys[post.pk] not in cards]
+    if missing:
+        missing = _from_primary(missing)
+        card_template = context.template.engine.get_template(CARD_TEMPLATE)
+        # Как {% for %}: один уровень контекста на все карточки.
+        with context.push(group=group):
+            for post in missing:
+                context['post'] = post
+                cards[keys[post.pk]] = card_template.render(context)
+        # Пост, удалённый в основной базе, выводится как есть, но карточка
+        # из реплики в кэш не попадает.
+        cache.set_many(
+            {
+                keys[post.pk]: cards[keys[post.pk]] for post in missing
+                if post._state.db == DEFAULT_DB_ALIAS
+            },
+            settings.CACHE_TIME,
+        )
+    return mark_safe(CARD_SEPARATOR.join(
+        cards[keys[post.pk]] for post in posts
+    ))
+
+
+def _from_primary(posts):
+    """Те же посты из основной базы одним запросом."""
+    stale = [post.pk for post in posts if post._state.db != DEFAULT_DB_ALIAS]
+    if not stale:
+        return posts
+    fresh = Post.objects.using(DEFAULT_DB_ALIAS).select_related(
+        'author', 'group'
+    ).in_bulk(stale)
+    return [fresh.get(post.pk, post) for post in posts]
+
+
+class FragmentCacheNode(CacheNode):
+    def render(self, context):
+        try:
+            expire_time = int(self.expire_time_var.resolve(context))
+        except (template.VariableDoesNotExist, ValueError, TypeError):
+            raise template.TemplateSyntaxError(
+                '"fragment_cache" tag got an invalid timeout: '
+                f'{self.expire_time_var.var!r}'
+            )
+        vary_on = [var.resolve(context) for var in self.vary_on]
+
+        def compute():
+            # Ключ содержит версию, поэтому фрагмент собирается
+            # из основной базы, а не с реплики, которая могла отстать.
+            with primary_reads():
+                return self.nodelist.render(context)
+
+        return get_or_compute(
+            caches['default'],
+            make_template_fragment_key(self.fragment_name, vary_on),
+            compute,
+            expire_time,
+        )
+
+
+@register.tag('fragment_cache')
+def do_fragment_cache(parser, token):
+    """
+    Как {% cache %}, но фрагмент пересобирает только один запрос:
+    остальные отдают прежнюю версию, а пересчёт начинается немного
+    раньше срока (см. core.sqlite_cache.get_or_compute).
+
+        {% fragment_cache timeout name var1 var2 %}...{% endfragment_cache %}
+    """
+    nodelist = parser.parse(('endfragment_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]!r} tag requires at least 2 arguments.'
+        )
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(t) for t in tokens[3:]],
+        None,
+    )
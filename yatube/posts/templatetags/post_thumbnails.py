@@ -0,0 +1,11 @@
+from django import template
+
+from posts.thumbnails import ready_thumbnail as get_ready_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(image, size):
+    """Готовая миниатюра картинки или None, пока она создаётся."""
+    return get_ready_thumbnail(image, size)
@@ -0,0 +1,113 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404
+from django.test import AsyncRequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .. import async_views
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AsyncViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {number}', group=cls.group
+            ) for number in range(12)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.user, text='Первый комментарий'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+
+    def request(self, path='/', user=None, **data):
+        request = self.factory.get(path, data)
+        request.user = user or self.user
+        return request
+
+    async def test_feeds_render_loaded_page(self):
+        """Ленты выводят первую страницу и ссылку на следующую."""
+        views = {
+            'index': (async_views.index, {}),
+            'group': (async_views.group_posts, {'slug': 'group'}),
+            'profile': (async_views.profile, {'username': 'author'}),
+            'follow': (async_views.follow_index, {}),
+        }
+        for name, (view, kwargs) in views.items():
+            with self.subTest(view=name):
+                response = await view(self.request(), **kwargs)
+                content = response.content.decode()
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Пост 11', content)
+                self.assertNotIn('Пост 0', content)
+                self.assertIn('?after=', content)
+
+    def test_cached_feed_not_queried(self):
+        """Лента из кэша фрагментов не запрашивает посты."""
+        views = {
+            'index': (async_views.index, {}),
+            'group': (async_views.group_posts, {'slug': 'group'}),
+            'profile': (async_views.profile, {'username': 'author'}),
+        }
+        for name, (view, kwargs) in views.items():
+            with self.subTest(view=name):
+                view = async_to_sync(view)
+                view(self.request(), **kwargs)
+                with CaptureQueriesContext(connection) as queries:
+                    response = view(self.request(), **kwargs)
+                self.assertIn('Пост 11', response.content.decode())
+                self.assertFalse([
+                    query for query in queries
+                    if 'FROM "posts_post"' in query['sql']
+                ])
+
+    async def test_cursor_continues_on_next_page(self):
+        first = await async_views.index(self.request())
+        after = first.content.decode().split('?after=')[1].split('"')[0]
+        second = await async_views.index(self.request(after=after))
+        content = second.content.decode()
+        self.assertIn('Пост 0', content)
+        self.assertIn('?before=', content)
+
+    async def test_post_detail(self):
+        response = await async_views.post_detail(
+            self.request(), post_id=self.posts[0].pk
+        )
+        content = response.content.decode()
+        self.assertIn('Первый комментарий', content)
+        self.assertIn('Всего постов автора: <span>12</span>', content)
+
+    async def test_login_required_and_not_found(self):
+        anonymous = AnonymousUser()
+        for view, kwargs in (
+            (async_views.profile, {'username': 'author'}),
+            (async_views.follow_index, {}),
+        ):
+            with self.subTest(view=view.__name__):
+                response = await view(
+                    self.request(user=anonymous), **kwargs
+                )
+                self.assertEqual(response.status_code, 302)
+                self.assertIn('/auth/login/', response.url)
+        for view, kwargs in (
+            (async_views.group_posts, {'slug': 'missing'}),
+            (async_views.profile, {'username': 'missing'}),
+            (async_views.post_detail, {'post_id': 0}),
+        ):
+            with self.subTest(view=view.__name__):
+                with self.assertRaises(Http404):
+                    await view(self.request(), **kwargs)
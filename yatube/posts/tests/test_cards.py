@@ -0,0 +1,128 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.template import Context, Template
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..caching import version_key
+from ..models import Group, Post
+
+User = get_user_model()
+
+CARD_TEMPLATE = 'includes/post_card.html'
+
+
+class PostCardsCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        for number in range(3):
+            Post.objects.create(
+                author=cls.author, text=f'Пост {number}', group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def render(self, posts):
+        return Template('{% load post_cache %}{% post_cards posts %}').render(
+            Context({'posts': posts})
+        )
+
+    def test_page_reads_cards_with_get_many(self):
+        posts = list(Post.objects.select_related('author', 'group'))
+        first = self.render(posts)
+        self.assertEqual(first.count('<hr>'), len(posts) - 1)
+        default = caches['default']
+        with mock.patch.object(
+            default, 'get_many', wraps=default.get_many
+        ) as get_many:
+            self.assertEqual(self.render(posts), first)
+        # Версии и карточки — по одному запросу на страницу.
+        self.assertEqual(get_many.call_count, 2)
+
+    def test_new_post_renders_only_its_card(self):
+        self.client.get(reverse('posts:index'))
+        Post.objects.create(author=self.author, text='Новый пост')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новый пост')
+        self.assertTemplateUsed(response, CARD_TEMPLATE, count=1)
+
+    def test_edit_and_author_rename_reset_cards(self):
+        self.client.get(reverse('posts:index'))
+        post = Post.objects.first()
+        post.text = 'Исправленный пост'
+        post.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Исправленный пост')
+        self.assertTemplateUsed(response, CARD_TEMPLATE, count=1)
+
+        self.author.first_name = 'Фёдор'
+        self.author.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Фёдор Толстой', count=3)
+
+    def test_other_user_changes_keep_cards(self):
+        """Регистрация, вход и смена пароля не сбрасывают ленты."""
+        self.client.get(reverse('posts:index'))
+        user = User.objects.create_user(username='new', password='old')
+        user.set_password('new')
+        user.email = 'new@example.com'
+        user.save()
+        self.client.force_login(user)
+        name_version = cache.get(version_key('author_card', user.pk))
+        response = self.client.get(reverse('posts:index'))
+        self.assertTemplateNotUsed(response, CARD_TEMPLATE)
+        user.username = 'renamed'
+        user.save(update_fields=['username'])
+        self.assertNotEqual(
+            cache.get(version_key('author_card', user.pk)), name_version
+        )
+
+    def test_rename_resets_only_authors_cards(self):
+        """Смена имени автора или адреса группы сбрасывает их
+        карточки, но не весь кэш лент."""
+        other = User.objects.create_user(username='other')
+        Post.objects.create(author=other, text='Чужой пост')
+        self.client.force_login(other)
+        for username in (other.username, self.author.username):
+            self.client.get(reverse('posts:profile', args=[username]))
+        self.client.get(reverse('posts:index'))
+        feeds_version = cache.get(version_key('feeds'))
+
+        other.first_name = 'Антон'
+        other.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Антон')
+        self.assertTemplateUsed(response, CARD_TEMPLATE, count=1)
+        response = self.client.get(
+            reverse('posts:profile', args=[other.username])
+        )
+        self.assertContains(response, 'Антон')
+
+        self.group.slug = 'renamed'
+        self.group.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertTemplateUsed(response, CARD_TEMPLATE, count=3)
+        response = self.client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertContains(
+            response, reverse('posts:group_list', args=['renamed']), count=3
+        )
+        self.assertEqual(cache.get(version_key('feeds')), feeds_version)
+
+    def test_group_page_has_own_cards(self):
+        group_link = reverse('posts:group_list', args=['group'])
+        self.assertContains(
+            self.client.get(reverse('posts:index')), group_link, count=3
+        )
+        response = self.client.get(group_link)
+        self.assertTemplateUsed(response, CARD_TEMPLATE, count=3)
+        self.assertNotContains(response, 'все записи группы')
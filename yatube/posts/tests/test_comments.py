@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COUNT_COMMENT_PAGE=3)
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        for number in range(7):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {number}'
+            )
+        cls.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+        cls.fragment_url = reverse(
+            'posts:post_comments', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def texts(self, response):
+        return [comment.text for comment in response.context['comments']]
+
+    def test_detail_renders_first_batch(self):
+        """Страница поста выводит первую пачку и ссылку на фрагмент."""
+        response = self.client.get(self.detail_url)
+        comments = response.context['comments']
+        self.assertEqual(
+            self.texts(response),
+            ['Комментарий 6', 'Комментарий 5', 'Комментарий 4'],
+        )
+        self.assertContains(
+            response, f'{self.fragment_url}?after={comments.next_cursor}'
+        )
+
+    def test_fragment_continues_by_cursor(self):
+        """Фрагмент отдаёт следующие пачки до последнего комментария."""
+        after = self.client.get(self.detail_url).context['comments'] \
+            .next_cursor
+        seen = []
+        while after:
+            response = self.client.get(self.fragment_url, {'after': after})
+            self.assertTemplateUsed(response, 'includes/comments.html')
+            self.assertNotContains(response, '<html')
+            seen.extend(self.texts(response))
+            after = response.context['comments'].next_cursor
+        self.assertEqual(
+            seen, [f'Комментарий {number}' for number in range(3, -1, -1)]
+        )
+        self.assertNotContains(response, 'Показать ещё')
+
+    def test_fragment_for_missing_post(self):
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,135 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncRequestFactory, Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import async_views
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_list', args=['group']),
+            'profile': reverse('posts:profile', args=['author']),
+            'follow': reverse('posts:follow_index'),
+            'detail': reverse('posts:post_detail', args=[cls.post.pk]),
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def etag(self, name, client=None):
+        response = (client or self.client).get(self.urls[name])
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def assertNotModified(self, name, etag):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.urls[name], HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.templates)
+        return len(queries)
+
+    def test_unchanged_pages_return_304(self):
+        """Валидатор дешевле страницы: без выборки постов и шаблонов."""
+        for name in self.urls:
+            with self.subTest(page=name):
+                etag = self.etag(name)
+                # Сессия и пользователь плюс запросы валидатора.
+                self.assertLessEqual(self.assertNotModified(name, etag), 5)
+
+    def test_etag_depends_on_user_and_cursor(self):
+        other = Client()
+        other.force_login(self.author)
+        self.assertNotEqual(
+            self.etag('index'), self.etag('index', client=other)
+        )
+        with_cursor = self.client.get(self.urls['index'], {'after': 'x'})
+        self.assertNotEqual(with_cursor['ETag'], self.etag('index'))
+
+    def test_post_edit_changes_validators(self):
+        etags = {name: self.etag(name) for name in self.urls}
+        updated_at = self.post.updated_at
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated_at, updated_at)
+        for name, etag in etags.items():
+            with self.subTest(page=name):
+                self.assertNotEqual(self.etag(name), etag)
+
+    def test_comment_changes_post_detail(self):
+        etag = self.etag('detail')
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        changed = self.etag('detail')
+        self.assertNotEqual(changed, etag)
+        comment.text = 'Правка'
+        comment.save()
+        self.assertNotEqual(self.etag('detail'), changed)
+
+    def test_unfollow_changes_profile_and_follow_feed(self):
+        etags = {name: self.etag(name) for name in ('profile', 'follow')}
+        Follow.objects.filter(user=self.user).delete()
+        for name, etag in etags.items():
+            with self.subTest(page=name):
+                self.assertNotEqual(self.etag(name), etag)
+
+    def test_missing_objects_and_anonymous(self):
+        response = Client().get(self.urls['follow'])
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn('ETag', response)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[0]), HTTP_IF_NONE_MATCH='*'
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class AsyncConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def request(self, **headers):
+        request = AsyncRequestFactory().get('/', **headers)
+        request.user = self.user
+        return request
+
+    async def test_async_views_answer_304(self):
+        for view, kwargs in (
+            (async_views.index, {}),
+            (async_views.post_detail, {'post_id': self.post.pk}),
+        ):
+            with self.subTest(view=view.__name__):
+                response = await view(self.request(), **kwargs)
+                self.assertEqual(response.status_code, 200)
+                cached = await view(
+                    # Дополнительные заголовки ASGI-запроса — без HTTP_.
+                    self.request(**{'If-None-Match': response['ETag']}),
+                    **kwargs,
+                )
+                self.assertEqual(cached.status_code, 304)
@@ -0,0 +1,80 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Первая', slug='first')
+        cls.other_group = Group.objects.create(title='Вторая', slug='second')
+
+    def assertCounters(self, obj, **expected):
+        obj.refresh_from_db()
+        for field, value in expected.items():
+            with self.subTest(obj=obj, field=field):
+                self.assertEqual(getattr(obj, field), value)
+
+    def test_post_counters_follow_create_move_and_delete(self):
+        """Счётчики постов автора и группы меняются при создании,
+        смене группы и удалении поста."""
+        post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group
+        )
+        self.assertCounters(self.author.stats, posts_count=1)
+        self.assertCounters(self.group, posts_count=1)
+
+        post.group = self.other_group
+        post.save()
+        self.assertCounters(self.group, posts_count=0)
+        self.assertCounters(self.other_group, posts_count=1)
+
+        post.delete()
+        self.assertCounters(self.author.stats, posts_count=0)
+        self.assertCounters(self.other_group, posts_count=0)
+
+    def test_comment_and_follow_counters(self):
+        """Счётчики комментариев и подписок меняются при изменениях."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Комментарий'
+        )
+        self.assertCounters(post, comments_count=1)
+        comment.delete()
+        self.assertCounters(post, comments_count=0)
+
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertCounters(self.author.stats, followers_count=1)
+        self.assertCounters(self.user.stats, following_count=1)
+        Follow.objects.filter(user=self.user).delete()
+        self.assertCounters(self.author.stats, followers_count=0)
+        self.assertCounters(self.user.stats, following_count=0)
+
+    def test_recount_counters_fixes_drift(self):
+        """recount_counters исправляет расхождение, например после
+        bulk_create, который не отправляет сигналы."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {i}', group=self.group)
+            for i in range(3)
+        )
+        Follow.objects.bulk_create(
+            [Follow(user=self.user, author=self.author)]
+        )
+        UserStats.objects.filter(user=self.user).delete()
+        call_command('recount_counters', stdout=StringIO())
+        self.assertCounters(
+            self.author.stats, posts_count=3, followers_count=1
+        )
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).following_count, 1
+        )
+        self.assertCounters(self.group, posts_count=3)
@@ -0,0 +1,139 @@
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from .. import dumps, search
+from ..models import (
+    Comment, Follow, Group, Post, TimelineEntry, UserStats
+)
+
+User = get_user_model()
+
+
+class DumpsTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(title='Группа', slug='group')
+        self.posts = [
+            Post.objects.create(
+                author=self.author, group=group, text=f'Запись {number}'
+            ) for number in range(5)
+        ]
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def export(self):
+        stream = io.StringIO()
+        dumps.dump(stream, batch_size=2)
+        stream.seek(0)
+        return stream
+
+    def clear(self):
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+    def test_iter_objects_reads_in_small_pieces(self):
+        """Объект, разорванный границей чтения, собирается целиком."""
+        objects = [
+            {'text': 'скобки ] [ } { и "кавычки"'},
+            {'text': 'перевод\nстроки', 'n': [1, 2]},
+        ]
+        stream = io.StringIO(json.dumps(objects, indent=2))
+        self.assertEqual(
+            list(dumps.iter_objects(stream, read_size=7)), objects
+        )
+        with self.assertRaises(ValueError):
+            list(dumps.iter_objects(io.StringIO('[{"a": 1},')))
+
+    def test_iter_objects_bounds_broken_object(self):
+        """Битый объект не затягивает в буфер остаток файла."""
+        stream = io.StringIO(
+            '[{"a": 1}, {"a": oops}, ' + '{"b": 2}, ' * 1000 + ']'
+        )
+        objects = dumps.iter_objects(stream, read_size=16, max_size=100)
+        self.assertEqual(next(objects), {'a': 1})
+        with self.assertRaisesMessage(ValueError, 'на смещении 11'):
+            next(objects)
+        self.assertLess(stream.tell(), 500)
+
+    def test_round_trip_rebuilds_derived_data(self):
+        stream = self.export()
+        self.assertEqual(len(json.load(stream)), 2 + 1 + 5 + 1 + 1)
+        stream.seek(0)
+        # JSON хранит время с точностью до миллисекунд.
+        dates = {
+            post.pk: tuple(
+                date.replace(microsecond=date.microsecond // 1000 * 1000)
+                for date in (post.pub_date, post.updated_at)
+            ) for post in Post.objects.all()
+        }
+        self.clear()
+
+        loaded = dumps.load(stream, batch_size=3)
+        self.assertEqual(loaded['posts.post'], 5)
+        self.assertEqual({
+            post.pk: (post.pub_date, post.updated_at)
+            for post in Post.objects.all()
+        }, dates)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(
+            UserStats.objects.get(user_id=self.author.pk).posts_count, 5
+        )
+        self.assertEqual(
+            Post.objects.get(pk=self.posts[0].pk).comments_count, 1
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 5
+        )
+        self.assertEqual(
+            search.search_post_ids('комментарий', 10), [self.posts[0].pk]
+        )
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, Post._meta.db_table
+            )
+        self.assertIn('post_feed_idx', constraints)
+
+    def test_interrupted_load_resumes(self):
+        stream = self.export()
+        self.clear()
+        progress = []
+
+        def crash(consumed):
+            progress.append(consumed)
+            raise RuntimeError('сбой')
+
+        with self.assertRaises(RuntimeError):
+            dumps.load(stream, batch_size=4, checkpoint=crash)
+        self.assertEqual(progress, [4])
+        self.assertEqual(User.objects.count(), 2)
+
+        stream.seek(0)
+        dumps.load(stream, batch_size=4, skip=progress[0])
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_load_counts_only_inserted_rows(self):
+        """Существующие строки не входят в итог, связи многие-ко-многим
+        пользователя не выгружаются."""
+        stream = self.export()
+        users = [
+            data for data in json.load(stream)
+            if data['model'] == 'auth.user'
+        ]
+        self.assertNotIn('groups', users[0]['fields'])
+        self.assertNotIn('user_permissions', users[0]['fields'])
+        stream.seek(0)
+        for post in self.posts[:2]:
+            post.delete()
+
+        loaded = dumps.load(stream, batch_size=3)
+        self.assertEqual(loaded['posts.post'], 2)
+        self.assertEqual(loaded['auth.user'], 0)
+        self.assertEqual(Post.objects.count(), 5)
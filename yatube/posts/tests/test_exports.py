@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import exports
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ProfileExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {day}',
+                group=cls.group if day % 2 else None,
+            ) for day in range(1, 8)
+        ]
+        for day, post in enumerate(cls.posts, start=1):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=datetime(2023, 1, day, 12, tzinfo=timezone.utc)
+            )
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.author, text='Комментарий'
+        )
+        Post.objects.create(
+            author=User.objects.create_user(username='other'), text='Чужой'
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.url = reverse(
+            'posts:profile_export', kwargs={'username': 'author'}
+        )
+
+    def export(self, accept=None, **params):
+        headers = {'HTTP_ACCEPT': accept} if accept else {}
+        response = self.client.get(self.url, params, **headers)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_jsonl_export(self):
+        """Все посты автора от новых к старым с группой и комментариями."""
+        response, body = self.export('application/x-ndjson')
+        self.assertEqual(
+            response['Content-Type'], 'application/x-ndjson; charset=utf-8'
+        )
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(
+            [row['text'] for row in rows],
+            [f'Пост {day}' for day in range(7, 0, -1)],
+        )
+        self.assertEqual(rows[-1]['group_slug'], 'group')
+        self.assertEqual(rows[-1]['comments_count'], 1)
+        self.assertIsNone(rows[-2]['group_slug'])
+
+    def test_csv_export_with_date_range(self):
+        response, body = self.export(
+            'text/csv', since='2023-01-02', until='2023-01-04'
+        )
+        self.assertIn('author-posts.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(
+            [row['text'] for row in rows], ['Пост 4', 'Пост 3', 'Пост 2']
+        )
+
+    def test_negotiation_and_errors(self):
+        self.assertEqual(
+            exports.negotiate('text/csv;q=0.5, application/jsonl'), 'jsonl'
+        )
+        self.assertEqual(
+            exports.negotiate('text/html, text/csv;q=0.9, */*;q=0.1'), 'csv'
+        )
+        self.assertIsNone(exports.negotiate('text/html'))
+        self.assertEqual(
+            self.client.get(self.url, HTTP_ACCEPT='text/html').status_code,
+            406,
+        )
+        self.assertEqual(
+            self.client.get(self.url, {'since': '2023-02-30'}).status_code,
+            400,
+        )
+        self.assertEqual(Client().get(self.url).status_code, 302)
+
+    def test_batches_follow_the_keyset(self):
+        """Пачки по ключу не теряют и не повторяют посты."""
+        posts = list(exports.iter_posts(
+            Post.objects.filter(author=self.author), batch_size=3
+        ))
+        self.assertEqual(
+            [post['id'] for post in posts],
+            [post.pk for post in reversed(self.posts)],
+        )
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {number} <b>',
+                group=cls.group if number % 2 else None,
+            ) for number in range(3)
+        ]
+        cls.urls = {
+            reverse('posts:index_rss'): 'application/rss+xml',
+            reverse('posts:index_atom'): 'application/atom+xml',
+            reverse('posts:group_rss', args=['group']):
+                'application/rss+xml',
+            reverse('posts:group_atom', args=['group']):
+                'application/atom+xml',
+            reverse('posts:profile_rss', args=['author']):
+                'application/rss+xml',
+            reverse('posts:profile_atom', args=['author']):
+                'application/atom+xml',
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_content(self):
+        for url, content_type in self.urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                self.assertTrue(response['ETag'].startswith('"'))
+                self.assertIn('Last-Modified', response)
+                self.assertContains(response, 'Пост 1 &amp;lt;b&amp;gt;')
+        group_feed = self.client.get(reverse(
+            'posts:group_rss', args=['group']
+        ))
+        self.assertNotContains(group_feed, 'Пост 2')
+
+    def test_not_modified(self):
+        """Совпавший валидатор даёт 304 за один запрос к базе."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                for headers in (
+                    {'HTTP_IF_NONE_MATCH': response['ETag']},
+                    {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']},
+                ):
+                    with CaptureQueriesContext(connection) as queries:
+                        cached = self.client.get(url, **headers)
+                    self.assertEqual(cached.status_code, 304)
+                    self.assertEqual(cached['ETag'], response['ETag'])
+                    self.assertEqual(len(queries), 1)
+
+    def test_body_is_cached_until_change(self):
+        url = reverse('posts:profile_atom', args=['author'])
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(second.content, first.content)
+        post = self.posts[2]
+        post.text = 'Исправленный пост'
+        post.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+        self.assertContains(changed, 'Исправленный пост')
+
+    def test_missing_and_empty_feeds(self):
+        self.assertEqual(self.client.get(
+            reverse('posts:group_rss', args=['missing'])
+        ).status_code, 404)
+        self.assertEqual(self.client.get(
+            reverse('posts:profile_atom', args=['missing'])
+        ).status_code, 404)
+        Group.objects.create(title='Пустая', slug='empty')
+        response = self.client.get(reverse('posts:group_rss', args=['empty']))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow
+
+User = get_user_model()
+
+
+@override_settings(COUNT_FOLLOW_PAGE=3)
+class FollowListsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.fans = [
+            User.objects.create_user(username=f'fan{number}')
+            for number in range(7)
+        ]
+        for fan in cls.fans:
+            Follow.objects.create(user=fan, author=cls.author)
+        Follow.objects.create(user=cls.author, author=cls.fans[0])
+        cls.followers_url = reverse(
+            'posts:followers', kwargs={'username': 'author'}
+        )
+        cls.following_url = reverse(
+            'posts:following', kwargs={'username': 'author'}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_followers_pages(self):
+        """Подписчики идут страницами по курсору от новых id к старым."""
+        names = []
+        response = self.client.get(self.followers_url)
+        while True:
+            page_obj = response.context['page_obj']
+            names += [person.username for person in page_obj]
+            if not page_obj.has_next():
+                break
+            response = self.client.get(
+                self.followers_url, {'after': page_obj.next_cursor}
+            )
+        self.assertEqual(
+            names, [fan.username for fan in reversed(self.fans)]
+        )
+        self.assertTrue(response.context['followers'])
+
+    def test_following(self):
+        response = self.client.get(self.following_url)
+        self.assertEqual(list(response.context['page_obj']), [self.fans[0]])
+        self.assertFalse(response.context['followers'])
+
+    def test_unknown_author(self):
+        response = self.client.get(
+            reverse('posts:followers', kwargs={'username': 'nobody'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_profile_counts(self):
+        """Профиль выводит счётчики и ссылки на списки."""
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        self.assertContains(response, 'Подписчиков: 7')
+        self.assertContains(response, 'подписок: 1')
+        self.assertContains(response, self.followers_url)
+        self.assertContains(response, self.following_url)
+
+    def test_new_follower_changes_profile_etag(self):
+        """Чужая подписка меняет счётчик, а с ним и ETag профиля."""
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        etag = self.client.get(url)['ETag']
+        Follow.objects.create(
+            user=User.objects.create_user(username='new'), author=self.author
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Подписчиков: 8')
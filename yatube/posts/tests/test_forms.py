@@ -1,12 +1,14 @@
 import shutil
 import tempfile
 from http import HTTPStatus
+from io import BytesIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Comment, Group, Post
 
@@ -135,3 +137,93 @@ class PostFormTest(TestCase):
         )
         comment_in_page = response.context.get('comments')[0]
         self.assertEqual(comment_in_page.text, comment['text'])
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    UPLOAD_MAX_SIDE=100,
+    UPLOAD_MAX_PIXELS=1_000_000,
+)
+class PostImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def make_jpeg(self, size, name='photo.jpg'):
+        exif = Image.Exif()
+        exif[0x010F] = 'Телефон автора'
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(
+            name=name, content=buffer.getvalue(), content_type='image/jpeg'
+        )
+
+    def test_large_photo_is_downscaled_and_stripped(self):
+        """Большое фото уменьшается до UPLOAD_MAX_SIDE, а EXIF удаляется."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Фото', 'image': self.make_jpeg((400, 200))},
+        )
+        post = Post.objects.get(text='Фото')
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, (100, 50))
+            self.assertEqual(stored.format, 'JPEG')
+            self.assertEqual(len(stored.getexif()), 0)
+
+    def make_gif(self, size, frames=3):
+        images = [
+            Image.new('RGB', size, color)
+            for color in ('red', 'green', 'blue', 'white', 'black')[:frames]
+        ]
+        buffer = BytesIO()
+        images[0].save(
+            buffer, 'GIF', save_all=True, append_images=images[1:],
+            duration=100, loop=0, comment=b'GPS: 55.75, 37.62',
+        )
+        return SimpleUploadedFile(
+            name='anim.gif', content=buffer.getvalue(),
+            content_type='image/gif',
+        )
+
+    def test_animation_is_downscaled_and_stripped(self):
+        """Анимация уменьшается по кадрам и теряет метаданные."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Анимация', 'image': self.make_gif((400, 200))},
+        )
+        post = Post.objects.get(text='Анимация')
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, 'GIF')
+            self.assertEqual(stored.size, (100, 50))
+            self.assertEqual(stored.n_frames, 3)
+            self.assertNotIn('comment', stored.info)
+
+    def test_too_long_animation_rejected(self):
+        """UPLOAD_MAX_PIXELS ограничивает все кадры анимации вместе."""
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Длинная', 'image': self.make_gif((500, 500), 5)
+            },
+        )
+        self.assertFalse(Post.objects.filter(text='Длинная').exists())
+        self.assertTrue(response.context['form'].errors.get('image'))
+
+    def test_too_many_pixels_rejected(self):
+        """Картинка больше UPLOAD_MAX_PIXELS не сохраняется."""
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Огромное', 'image': self.make_jpeg((2000, 1000))},
+        )
+        self.assertFalse(Post.objects.filter(text='Огромное').exists())
+        self.assertTrue(response.context['form'].errors.get('image'))
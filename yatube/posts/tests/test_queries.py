@@ -0,0 +1,200 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryBudgetTest(TestCase):
+    """Число SQL-запросов на каждый URL posts/urls.py не зависит от
+    количества постов и комментариев на странице."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.authors = [
+            User.objects.create_user(
+                username=f'author{i}', first_name='Имя', last_name=str(i)
+            ) for i in range(5)
+        ]
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for author in cls.authors:
+            Follow.objects.create(user=cls.user, author=author)
+            if author != cls.authors[0]:
+                Follow.objects.create(user=cls.authors[0], author=author)
+            for i in range(3):
+                Post.objects.create(
+                    author=author,
+                    text=f'Пост {i} автора {author.username}',
+                    group=cls.group,
+                )
+        cls.post = Post.objects.filter(author=cls.authors[0]).first()
+        for author in cls.authors:
+            Comment.objects.create(
+                post=cls.post, author=author, text='Комментарий'
+            )
+        cls.budgets = {
+            reverse('posts:index'): 3,
+            # Страницы с условным GET читают валидатор отдельным
+            # запросом (posts/conditional.py).
+            reverse(
+                'posts:group_list', kwargs={'slug': cls.group.slug}
+            ): 5,
+            reverse('posts:post_create'): 3,
+            reverse(
+                'posts:post_edit', kwargs={'post_id': cls.post.id}
+            ): 4,
+            reverse(
+                'posts:profile', kwargs={'username': cls.authors[0]}
+            ): 7,
+            reverse(
+                'posts:post_detail', kwargs={'post_id': cls.post.id}
+            ): 6,
+            reverse(
+                'posts:post_comments', kwargs={'post_id': cls.post.id}
+            ): 4,
+            reverse('posts:follow_index'): 6,
+            reverse(
+                'posts:followers', kwargs={'username': cls.authors[1]}
+            ): 4,
+            reverse(
+                'posts:following', kwargs={'username': cls.user}
+            ): 4,
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.author_client = Client()
+        self.author_client.force_login(self.authors[0])
+
+    def assertQueriesAtMost(self, budget, func, message):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            f'{message}: {len(queries)} запросов вместо {budget}\n'
+            + '\n'.join(query['sql'] for query in queries.captured_queries)
+        )
+
+    def test_get_pages_query_budget(self):
+        """Страницы с лентами и постом укладываются в бюджет запросов."""
+        for address, budget in self.budgets.items():
+            with self.subTest(address=address):
+                self.assertQueriesAtMost(
+                    budget,
+                    lambda: self.author_client.get(address),
+                    address,
+                )
+
+    def test_budget_does_not_grow_with_page_size(self):
+        """Новые посты и комментарии не добавляют запросов."""
+        for author in self.authors:
+            Post.objects.create(author=author, text='ещё пост')
+            Comment.objects.create(
+                post=self.post, author=author, text='ещё комментарий'
+            )
+        self.test_get_pages_query_budget()
+
+    def test_write_urls_query_budget(self):
+        """Комментарий, подписка и отписка — ограниченное число запросов."""
+        author = self.authors[1]
+        write_urls = {
+            reverse(
+                'posts:add_comment', kwargs={'post_id': self.post.id}
+            ): 8,
+            reverse(
+                'posts:profile_follow', kwargs={'username': author}
+            ): 4,
+            # Девятый — не перестал ли автор быть популярным (timeline.py).
+            reverse(
+                'posts:profile_unfollow', kwargs={'username': author}
+            ): 9,
+        }
+        for address, budget in write_urls.items():
+            with self.subTest(address=address):
+                self.assertQueriesAtMost(
+                    budget,
+                    lambda: self.authorized_client.post(
+                        address, {'text': 'огонь'}
+                    ),
+                    address,
+                )
+
+
+@skipUnlessDBFeature('supports_explaining_query_execution')
+class IndexUsageTest(TestCase):
+    """Ленты и страница поста читаются по составным индексам,
+    без сортировки всей выборки (EXPLAIN QUERY PLAN в SQLite)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(15):
+            Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group
+            )
+        cls.post = Post.objects.first()
+        Comment.objects.create(post=cls.post, author=cls.user, text='Ура')
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.author}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.id}),
+            reverse('posts:post_comments', kwargs={'post_id': cls.post.id}),
+            reverse('posts:follow_index'),
+            reverse('posts:index_rss'),
+            reverse('posts:group_atom', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile_atom', kwargs={'username': cls.author}),
+            reverse('posts:followers', kwargs={'username': cls.author}),
+            reverse('posts:following', kwargs={'username': cls.user}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def query_plans(self, address):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(address)
+            self.assertEqual(response.status_code, 200, address)
+            page_obj = (response.context or {}).get('page_obj')
+            if page_obj is not None and page_obj.has_next():
+                self.authorized_client.get(
+                    address, {'after': page_obj.next_cursor}
+                )
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or 'posts_' not in sql:
+                    continue
+                cursor.execute(
+                    connection.ops.explain_query_prefix() + ' ' + sql
+                )
+                yield sql, ' | '.join(str(row) for row in cursor.fetchall())
+
+    def test_views_use_index_instead_of_sort(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('План проверяется для SQLite')
+        for address in self.urls:
+            for sql, plan in self.query_plans(address):
+                with self.subTest(address=address, sql=sql):
+                    self.assertNotIn('TEMP B-TREE', plan, plan)
+                    self.assertNotRegex(plan, r"SCAN posts_\w+'", plan)
@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.admin = User.objects.create_superuser(
+            username='admin', password='pass'
+        )
+
+    def test_posts_and_comments_are_indexed(self):
+        """Пост находится по своему тексту и по тексту комментария."""
+        post = Post.objects.create(author=self.author, text='Утренний туман')
+        other = Post.objects.create(author=self.author, text='Вечер')
+        Comment.objects.create(
+            post=other, author=self.author, text='Туман над рекой'
+        )
+        self.assertCountEqual(
+            search.search_post_ids('туман', 10), [post.pk, other.pk]
+        )
+        self.assertEqual(search.search_post_ids('реКой', 10), [other.pk])
+
+    def test_ranking_and_special_characters(self):
+        """Чаще встречающееся слово выше, синтаксис FTS из запроса
+        не выполняется."""
+        rare = Post.objects.create(
+            author=self.author, text='кот и длинный рассказ о погоде'
+        )
+        often = Post.objects.create(author=self.author, text='кот кот кот')
+        self.assertEqual(
+            search.search_post_ids('кот', 10), [often.pk, rare.pk]
+        )
+        self.assertEqual(search.search_post_ids('кот" OR "*', 10), [])
+        self.assertEqual(search.search_post_ids('  ', 10), [])
+
+    def test_changes_and_deletes_update_index(self):
+        post = Post.objects.create(author=self.author, text='Старый текст')
+        comment = Comment.objects.create(
+            post=post, author=self.author, text='Заметка'
+        )
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(search.search_post_ids('старый', 10), [])
+        self.assertEqual(search.search_post_ids('новый', 10), [post.pk])
+        comment.delete()
+        self.assertEqual(search.search_post_ids('заметка', 10), [])
+        post.delete()
+        self.assertEqual(search.search_post_ids('текст', 10), [])
+
+    def test_reindex_rebuilds_index(self):
+        post = Post.objects.create(author=self.author, text='Индекс')
+        search.remove_post(post.pk)
+        self.assertEqual(search.search_post_ids('индекс', 10), [])
+        search.reindex()
+        self.assertEqual(search.search_post_ids('индекс', 10), [post.pk])
+
+    def test_search_page(self):
+        """Страница поиска выводит найденные посты с навигацией."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'Лес {number}')
+            for number in range(11)
+        ]
+        url = reverse('posts:search')
+        response = Client().get(url, {'q': 'лес'})
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(len(response.context['posts']), 10)
+        self.assertTrue(response.context['has_next'])
+        response = Client().get(url, {'q': 'лес', 'page': 2})
+        self.assertEqual(len(response.context['posts']), 1)
+        self.assertFalse(response.context['has_next'])
+        self.assertIn(response.context['posts'][0], posts)
+        response = Client().get(url)
+        self.assertEqual(response.context['posts'], [])
+
+    def test_admin_search_uses_index(self):
+        post = Post.objects.create(author=self.author, text='Редкое слово')
+        Post.objects.create(author=self.author, text='Другое')
+        client = Client()
+        client.force_login(self.admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'редкое'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [post]
+        )
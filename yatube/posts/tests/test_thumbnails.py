@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, JOBS_EAGER=True)
+class ThumbnailPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, name='small.gif'):
+        return SimpleUploadedFile(
+            name=name, content=SMALL_GIF, content_type='image/gif'
+        )
+
+    def test_form_upload_generates_every_size(self):
+        """После сохранения формы готовы все размеры миниатюр,
+        а страницы показывают их вместо заглушки."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                {'text': 'С картинкой', 'image': self.upload()},
+            )
+        post = Post.objects.get(text='С картинкой')
+        for size in settings.POST_THUMBNAILS:
+            with self.subTest(size=size):
+                self.assertIsNotNone(
+                    thumbnails.ready_thumbnail(post.image, size)
+                )
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(
+            response, thumbnails.ready_thumbnail(post.image, 'card').url
+        )
+        self.assertNotContains(response, 'Картинка обрабатывается')
+
+    def test_pending_thumbnail_shows_placeholder(self):
+        """Пока миниатюра не готова, шаблон не создаёт её сам."""
+        post = Post.objects.create(
+            author=self.user, text='Жду', image=self.upload('wait.gif')
+        )
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        self.assertContains(response, 'Картинка обрабатывается')
+        self.assertIsNone(thumbnails.ready_thumbnail(post.image, 'detail'))
+
+    def test_generate_thumbnails_command(self):
+        """Команда generate_thumbnails создаёт миниатюры старых картинок."""
+        post = Post.objects.create(
+            author=self.user, text='Старый', image=self.upload('old.gif')
+        )
+        call_command(
+            'generate_thumbnails', workers=1, stdout=StringIO()
+        )
+        self.assertIsNotNone(thumbnails.ready_thumbnail(post.image, 'card'))
@@ -0,0 +1,118 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Job
+
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Пост до подписки'
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def follow(self):
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': self.author})
+        )
+
+    def feed_posts(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка добавляет старые посты автора, отписка их убирает."""
+        self.follow()
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.user, post=self.old_post
+            ).exists()
+        )
+        self.assertEqual(self.feed_posts(), [self.old_post])
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': self.author})
+        )
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(self.feed_posts(), [])
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост автора попадает в ленту подписчика при публикации."""
+        self.follow()
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.post(
+            reverse('posts:post_create'), {'text': 'Свежий пост'}
+        )
+        new_post = Post.objects.get(text='Свежий пост')
+        self.assertEqual(self.feed_posts(), [new_post, self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_read_on_fan_out(self):
+        """Посты популярного автора не раскладываются, а читаются из
+        его профиля при открытии ленты."""
+        self.follow()
+        new_post = Post.objects.create(author=self.author, text='Для всех')
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed_posts(), [new_post, self.old_post])
+
+    def test_rebuild_timelines_command(self):
+        """Команда rebuild_timelines восстанавливает потерянные ленты."""
+        Follow.objects.create(user=self.user, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.feed_posts(), [self.old_post])
+
+    def run_jobs(self):
+        call_command('run_jobs', processes=0, once=True, stdout=StringIO())
+
+    @override_settings(TIMELINE_BACKFILL=2, JOBS_EAGER=False)
+    def test_follow_backfills_newest_and_queues_history(self):
+        """Подписка сразу копирует только последние посты автора,
+        остальные добавляет фоновая задача."""
+        newer = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(2)
+        ]
+        self.follow()
+        self.assertEqual(self.feed_posts(), newer[::-1])
+        self.assertEqual(
+            Job.objects.get().func, 'posts.timeline.backfill_history'
+        )
+        self.run_jobs()
+        self.assertEqual(self.feed_posts(), [*newer[::-1], self.old_post])
+
+    @override_settings(TIMELINE_BACKFILL=1, JOBS_EAGER=False)
+    def test_history_job_skipped_after_unfollow(self):
+        Post.objects.create(author=self.author, text='Новый пост')
+        self.follow()
+        Follow.objects.filter(user=self.user).delete()
+        self.run_jobs()
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1, JOBS_EAGER=False)
+    def test_author_no_longer_popular_fans_out_missed_posts(self):
+        """Посты, опубликованные, пока автор был популярным, попадают
+        в ленты, когда подписчиков становится не больше предела."""
+        other = User.objects.create_user(username='other')
+        self.follow()
+        Follow.objects.create(user=other, author=self.author)
+        missed = Post.objects.create(author=self.author, text='Для всех')
+        self.assertFalse(TimelineEntry.objects.filter(post=missed).exists())
+        Follow.objects.filter(user=other).delete()
+        self.run_jobs()
+        self.assertEqual(self.feed_posts(), [missed, self.old_post])
@@ -122,6 +122,8 @@ class PostPagesTests(TestCase):
         for name_page, template in self.templates_pages_names_views.items():
             with self.subTest(reverse_name=name_page):
                 error = f'проверьте context в {template}'
+                # Готовые карточки из кэша шаблон не рендерит.
+                cache.clear()
                 response = (self.authorized_client.
                             get(name_page))
 
@@ -160,20 +162,46 @@ class PostPagesTests(TestCase):
                 self.assertEqual(post_id, self.post2.pk, message_error_output)
 
     def test_post_index_cache(self):
-        """Проверка кеша на главной страницы"""
+        """Проверка кеша на главной страницы: лента отдаётся из кэша,
+        пока пост не изменён, а после удаления поста сбрасывается"""
         post = Post.objects.create(
             author=self.user,
             text='удали меня',
         )
         response = self.authorized_client.get(reverse('posts:index'))
         self.assertContains(response, post.text)
-        Post.objects.filter(id=post.id).delete()
+        Post.objects.filter(id=post.id).update(text='мимо сигналов')
         response_cache = self.authorized_client.get(reverse('posts:index'))
         self.assertContains(response_cache, post.text)
-        cache.clear()
+        Post.objects.get(id=post.id).delete()
         response_cache_del = self.authorized_client.get(reverse('posts:index'))
         self.assertNotContains(response_cache_del, post.text)
 
+    def test_cached_feed_is_not_shared_between_users(self):
+        """Шапка страницы не кэшируется вместе с лентой:
+        каждый пользователь видит свой логин."""
+        self.authorized_client.get(reverse('posts:index'))
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertContains(response, self.user_2.username)
+        self.assertContains(response, self.post2.text)
+
+    def test_cached_feed_skips_database(self):
+        """Тёплая лента не выполняет запрос постов."""
+        self.client.get(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, self.post2.text)
+
+    def test_group_edit_resets_cached_cards(self):
+        """Смена адреса группы сбрасывает карточки в кэшированных лентах."""
+        self.client.get(reverse('posts:index'))
+        self.group.slug = 'new-slug'
+        self.group.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, '/group/new-slug/')
+        self.group.slug = 'test-slug'
+        self.group.save()
+
     def test_follow_create_and_del(self):
         """Авторизованный пользователь может подписываться
         на других пользователей и удалять их из подписок"""
@@ -284,3 +312,61 @@ class PaginatorViewsTest(TestCase):
                     settings.COUNT_POST_PAGE,
                     message_error_output
                 )
+
+    def test_cursor_pages_next_and_previous(self):
+        """Курсорная пагинация: по ссылке «дальше» открывается остаток
+        записей, по ссылке «назад» — снова первая страница."""
+        for reverse_name, temp in self.templates_pages_names_Paginator.items():
+            message_error_output = f"Проверь курсор на:{temp} "
+            with self.subTest(reverse_name=reverse_name):
+                first = self.authorized_client.get(reverse_name)
+                first_page = first.context['page_obj']
+                self.assertTrue(first_page.has_next(), message_error_output)
+                self.assertFalse(first_page.has_previous())
+
+                second = self.authorized_client.get(
+                    reverse_name, {'after': first_page.next_cursor}
+                )
+                second_page = second.context['page_obj']
+                self.assertEqual(len(second_page), 5, message_error_output)
+                self.assertFalse(second_page.has_next())
+                self.assertTrue(second_page.has_previous())
+                self.assertTrue(
+                    set(first_page).isdisjoint(second_page),
+                    message_error_output
+                )
+
+                back = self.authorized_client.get(
+                    reverse_name, {'before': second_page.previous_cursor}
+                )
+                self.assertEqual(
+                    list(back.context['page_obj']),
+                    list(first_page),
+                    message_error_output
+                )
+
+    def test_broken_cursor_opens_first_page(self):
+        """Битый курсор не роняет страницу, а открывает первую."""
+        response = self.authorized_client.get(
+            reverse('posts:index'), {'after': 'не-курсор'}
+        )
+        self.assertEqual(
+            len(response.context['page_obj']),
+            settings.COUNT_POST_PAGE,
+        )
+
+    def test_is_paginated(self):
+        """Навигация по страницам есть, только если страниц больше одной."""
+        group = Group.objects.create(title='Одна страница', slug='one-page')
+        Post.objects.create(text='Один пост', author=self.user, group=group)
+        pages = {
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}):
+                True,
+            reverse('posts:group_list', kwargs={'slug': group.slug}): False,
+        }
+        for reverse_name, paginated in pages.items():
+            with self.subTest(reverse_name=reverse_name):
+                response = self.authorized_client.get(reverse_name)
+                self.assertIs(
+                    bool(response.context['is_paginated']), paginated
+                )
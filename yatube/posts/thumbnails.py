@@ -0,0 +1,77 @@
+"""
+Миниатюры картинок постов, которые готовятся заранее.
+
+После сохранения поста с картинкой все размеры из settings.POST_THUMBNAILS
+создаёт воркер очереди фоновых задач, а шаблоны только ищут готовую
+миниатюру в хранилище ключей sorl.thumbnail и, пока её нет, показывают
+заглушку.
+Так первый читатель после загрузки не ждёт декодирования и ресайза.
+"""
+from django.conf import settings
+from django.db import connection
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as thumbnail_defaults
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import jobs
+
+from . import caching
+from .models import Post
+
+
+class ReadyThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl.thumbnail, который умеет только искать готовую
+    миниатюру, ничего не создавая."""
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(thumbnail_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = ReadyThumbnailBackend()
+
+
+def ready_thumbnail(image, size):
+    """Готовая миниатюра размера size из POST_THUMBNAILS или None."""
+    if not image:
+        return None
+    geometry, options = settings.POST_THUMBNAILS[size]
+    return backend.get_ready_thumbnail(image, geometry, **options)
+
+
+def generate(post_id):
+    """Создаёт все размеры миниатюр поста и сбрасывает его карточку."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    for geometry, options in settings.POST_THUMBNAILS.values():
+        backend.get_thumbnail(post.image, geometry, **options)
+    caching.bump_post(post)
+
+
+def generate_in_thread(post_id):
+    try:
+        generate(post_id)
+    finally:
+        # У каждого потока пула своё соединение с базой.
+        connection.close()
+
+
+def schedule(post):
+    """Ставит создание миниатюр в очередь фоновых задач (core/jobs.py):
+    задача видна воркеру после фиксации транзакции поста."""
+    jobs.enqueue(
+        generate, args=(post.pk,), priority=jobs.HIGH,
+        key=f'thumbnails:{post.pk}',
+    )
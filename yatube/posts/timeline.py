@@ -0,0 +1,208 @@
+"""
+Материализованная лента подписок (fan-out on write).
+
+Когда автор публикует пост, запись о нём раскладывается в ленты всех
+подписчиков, а страница /follow/ читает только свою ленту по индексу
+(user, -pub_date, -post). Популярные авторы, у которых подписчиков больше
+settings.TIMELINE_FANOUT_LIMIT, в ленты не раскладываются: их посты
+подмешиваются при чтении (fan-out on read).
+
+При подписке в ленту сразу попадают settings.TIMELINE_BACKFILL самых
+новых постов автора — первые страницы ленты, — а остальную историю
+добавляет фоновая задача (core/jobs.py): запрос подписки не копирует
+тысячи постов плодовитого автора. Когда автор перестаёт быть популярным,
+задача раскладывает его посты в ленты всех подписчиков: опубликованные,
+пока он был популярным, иначе пропали бы из лент.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from core import jobs
+
+from .models import Follow, Post, TimelineEntry, UserStats
+
+BATCH_SIZE = 1000
+
+
+def _popular_authors(user):
+    return Follow.objects.filter(
+        user_id=user.pk,
+        author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('author_id', flat=True)
+
+
+def popular_author_ids(user):
+    """id авторов из подписок пользователя, чьи посты не раскладываются."""
+    return list(_popular_authors(user))
+
+
+def is_popular(author_id):
+    return UserStats.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).exists()
+
+
+def _bulk_insert(entries):
+    """Вставляет записи пачками; возвращает их число."""
+    batch = []
+    count = 0
+    for entry in entries:
+        batch.append(entry)
+        count += 1
+        if len(batch) >= BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+    return count
+
+
+def fan_out(post):
+    """Раскладывает новый пост в ленты подписчиков автора."""
+    if is_popular(post.author_id):
+        return
+    followers = (
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        ) for user_id in followers
+    )
+
+
+def backfill(user_id, author_id, limit=None):
+    """
+    Добавляет в ленту подписчика уже опубликованные посты автора:
+    limit самых новых или все. Возвращает число прочитанных постов.
+    """
+    if is_popular(author_id):
+        return 0
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')
+    if limit is not None:
+        posts = posts[:limit]
+    return _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        ) for post_id, pub_date in posts.iterator(chunk_size=BATCH_SIZE)
+    )
+
+
+def follow_started(user_id, author_id):
+    """Подписка: первые страницы ленты сразу, остальная история автора —
+    фоновой задачей."""
+    limit = settings.TIMELINE_BACKFILL
+    if backfill(user_id, author_id, limit) >= limit:
+        jobs.enqueue(
+            backfill_history, args=(user_id, author_id),
+            priority=jobs.LOW, key=f'timeline:{user_id}:{author_id}',
+        )
+
+
+def backfill_history(user_id, author_id):
+    """Фоновая задача: вся история автора в ленте подписчика,
+    если он ещё подписан."""
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        backfill(user_id, author_id)
+
+
+def follow_ended(user_id, author_id):
+    """Отписка: посты автора уходят из ленты, а автор, у которого
+    подписчиков стало не больше предела, снова раскладывается."""
+    prune(user_id, author_id)
+    if UserStats.objects.filter(
+        user_id=author_id, followers_count=settings.TIMELINE_FANOUT_LIMIT,
+    ).exists():
+        jobs.enqueue(
+            fan_out_author, args=(author_id,),
+            priority=jobs.LOW, key=f'timeline:{author_id}',
+        )
+
+
+def fan_out_author(author_id):
+    """
+    Фоновая задача: раскладывает все посты автора в ленты подписчиков
+    одним INSERT ... SELECT. Посты, которые уже в лентах, пропускаются.
+    Возвращает число добавленных записей.
+    """
+    if is_popular(author_id):
+        return 0
+    with connection.cursor() as cursor:
+        # WHERE перед ON CONFLICT обязателен для разбора в SQLite.
+        cursor.execute(
+            f'INSERT INTO {TimelineEntry._meta.db_table} '
+            '(user_id, post_id, author_id, pub_date) '
+            'SELECT follow.user_id, post.id, post.author_id, post.pub_date '
+            f'FROM {Follow._meta.db_table} follow '
+            f'JOIN {Post._meta.db_table} post '
+            'ON post.author_id = follow.author_id '
+            'WHERE follow.author_id = %s '
+            'ON CONFLICT DO NOTHING',
+            [author_id],
+        )
+        return cursor.rowcount
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты посты автора, от которого отписались."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild():
+    """Пересобирает все ленты с нуля одним INSERT ... SELECT
+    по подпискам на непопулярных авторов. Возвращает число записей."""
+    TimelineEntry.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {TimelineEntry._meta.db_table} '
+            '(user_id, post_id, author_id, pub_date) '
+            'SELECT follow.user_id, post.id, post.author_id, post.pub_date '
+            f'FROM {Follow._meta.db_table} follow '
+            f'JOIN {Post._meta.db_table} post '
+            'ON post.author_id = follow.author_id '
+            f'LEFT JOIN {UserStats._meta.db_table} stats '
+            'ON stats.user_id = follow.author_id '
+            'WHERE COALESCE(stats.followers_count, 0) <= %s',
+            [settings.TIMELINE_FANOUT_LIMIT],
+        )
+    return TimelineEntry.objects.count()
+
+
+def _feed(user, popular):
+    if not popular:
+        entries = TimelineEntry.objects.filter(user=user).select_related(
+            'post__author', 'post__group'
+        )
+        return entries, ('pub_date', 'post_id'), lambda entry: entry.post
+    posts = Post.objects.select_related('author', 'group').filter(
+        Q(id__in=user.timeline.values('post_id'))
+        | Q(author_id__in=popular)
+    )
+    return posts, ('pub_date', 'id'), None
+
+
+def follow_feed(user):
+    """
+    Возвращает (queryset, поля курсора, преобразование строки в пост)
+    для ленты подписок. Без популярных авторов это чтение одной ленты,
+    иначе посты популярных авторов подмешиваются при чтении.
+    """
+    return _feed(user, popular_author_ids(user))
+
+
+async def afollow_feed(user):
+    """follow_feed для асинхронных представлений."""
+    popular = [author_id async for author_id in _popular_authors(user)]
+    return _feed(user, popular)
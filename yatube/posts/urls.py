@@ -1,22 +1,77 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, feeds, views
 
 app_name = 'posts'
 
+if settings.ASYNC_VIEWS:
+    feed_views = {
+        'index': async_views.index,
+        'group_list': async_views.group_posts,
+        'profile': async_views.profile,
+        'post_detail': async_views.post_detail,
+        'follow_index': async_views.follow_index,
+    }
+else:
+    feed_views = {
+        'index': views.IndexHome.as_view(),
+        'group_list': views.GroupPosts.as_view(),
+        'profile': views.Profile.as_view(),
+        'post_detail': views.PostDetailView.as_view(),
+        'follow_index': views.follow_index,
+    }
+
 urlpatterns = [
-    path('', views.IndexHome.as_view(), name='index'),
-    path('group/<str:slug>/', views.GroupPosts.as_view(), name='group_list'),
+    path('', feed_views['index'], name='index'),
+    path('rss/', feeds.PostsFeed(), name='index_rss'),
+    path('atom/', feeds.PostsAtomFeed(), name='index_atom'),
+    path('group/<str:slug>/', feed_views['group_list'], name='group_list'),
+    path('group/<str:slug>/rss/', feeds.GroupFeed(), name='group_rss'),
+    path('group/<str:slug>/atom/', feeds.GroupAtomFeed(), name='group_atom'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
-    path('profile/<str:username>/', views.Profile.as_view(), name='profile'),
-    path('posts/<int:post_id>/', views.PostDetailView.as_view(), name='post_detail'),
+    path('profile/<str:username>/', feed_views['profile'], name='profile'),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.AuthorFeed(),
+        name='profile_rss',
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.AuthorAtomFeed(),
+        name='profile_atom',
+    ),
+    path(
+        'posts/<int:post_id>/', feed_views['post_detail'], name='post_detail'
+    ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments',
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment',
     ),
-    path('follow/', views.follow_index, name='follow_index'),
+    path('follow/', feed_views['follow_index'], name='follow_index'),
+    path('search/', views.search_posts, name='search'),
+    path(
+        'profile/<str:username>/followers/',
+        views.followers,
+        name='followers',
+    ),
+    path(
+        'profile/<str:username>/following/',
+        views.following,
+        name='following',
+    ),
+    path(
+        'profile/<str:username>/export/',
+        views.profile_export,
+        name='profile_export',
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,9 +1,196 @@
+import base64
+import binascii
+import json
+from functools import cached_property
+
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.functional import SimpleLazyObject
+
+
+class CursorPage:
+    """
+    Страница курсорной (keyset) пагинации.
+    Не знает общего числа записей и своего номера: умеет только
+    отдавать ссылки на следующую и предыдущую страницы.
+    Запрос к базе выполняется лениво, при первом обращении к записям.
+    """
+    is_cursor = True
+
+    def __init__(self, paginator, after=None, before=None):
+        self.paginator = paginator
+        self.after = after
+        self.before = before
+
+    def _query(self):
+        paginator = self.paginator
+        if self.before is not None:
+            queryset = paginator.filter_before(self.before)
+        elif self.after is not None:
+            queryset = paginator.filter_after(self.after)
+        else:
+            queryset = paginator.ordered
+        return queryset[:paginator.per_page + 1]
+
+    def _split(self, rows):
+        """(записи страницы, есть ли следующая, есть ли предыдущая)."""
+        per_page = self.paginator.per_page
+        has_more = len(rows) > per_page
+        if self.before is not None:
+            return rows[:per_page][::-1], True, has_more
+        return rows[:per_page], has_more, self.after is not None
+
+    @cached_property
+    def _rows(self):
+        return self._split(list(self._query()))
+
+    async def aload(self):
+        """Загружает записи асинхронным ORM, чтобы шаблон их не запрашивал."""
+        if '_rows' not in self.__dict__:
+            self._rows = self._split([row async for row in self._query()])
+        return self
+
+    @cached_property
+    def object_list(self):
+        item = self.paginator.item
+        rows = self._rows[0]
+        return [item(row) for row in rows] if item else rows
+
+    def has_next(self):
+        return self._rows[1] and bool(self._rows[0])
+
+    def has_previous(self):
+        return self._rows[2] and bool(self._rows[0])
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return self.paginator.encode(self._rows[0][-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return self.paginator.encode(self._rows[0][0])
+        return None
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __repr__(self):
+        return f'<CursorPage after={self.after} before={self.before}>'
+
+
+class CursorPaginator:
+    """
+    Курсорный пагинатор по набору полей (по умолчанию pub_date, id).
+    Записи идут по убыванию ключа, страница выбирается условием
+    «ключ меньше курсора» вместо OFFSET, а COUNT(*) не выполняется вовсе,
+    поэтому глубина страницы не влияет на время запроса.
+    Курсор — непрозрачный токен с значениями ключа последней записи.
+    item — необязательное преобразование строки выборки в запись страницы.
+    """
+
+    def __init__(self, queryset, per_page, fields=('pub_date', 'id'),
+                 item=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.fields = tuple(fields)
+        self.item = item
+
+    @property
+    def ordered(self):
+        return self.queryset.order_by(
+            *(f'-{field}' for field in self.fields)
+        )
+
+    def encode(self, obj):
+        values = [
+            self._field(field).value_to_string(obj)
+            for field in self.fields
+        ]
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode(self, token):
+        """Возвращает значения ключа из токена или None для битого токена."""
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            values = json.loads(raw)
+            if len(values) != len(self.fields):
+                return None
+            return [
+                self._field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            return None
+
+    def filter_after(self, values):
+        return self.ordered.filter(self._keyset_q(values, 'lt'))
+
+    def filter_before(self, values):
+        return self.queryset.filter(self._keyset_q(values, 'gt')).order_by(
+            *self.fields
+        )
+
+    def get_page(self, after=None, before=None):
+        """Как Paginator.get_page: битый курсор ведёт на первую страницу."""
+        before = self.decode(before)
+        if before is not None:
+            return CursorPage(self, before=before)
+        return CursorPage(self, after=self.decode(after))
+
+    def _keyset_q(self, values, lookup):
+        condition = Q()
+        for position in reversed(range(len(self.fields))):
+            equal = {
+                field: value for field, value
+                in zip(self.fields[:position], values[:position])
+            }
+            step = Q(**equal, **{
+                f'{self.fields[position]}__{lookup}': values[position]
+            })
+            condition = step if not condition else step | condition
+        return condition
+
+    def _field(self, name):
+        return self.queryset.model._meta.get_field(name)
+
+
+class CursorPaginationMixin:
+    """Подменяет постраничную пагинацию ListView на курсорную."""
+    cursor_fields = ('pub_date', 'id')
+
+    def paginate_queryset(self, queryset, page_size):
+        page = _add_paginator_page(
+            self.request, queryset, page_size, self.cursor_fields
+        )
+        # is_paginated считается при первой проверке: страница из кэша
+        # фрагментов не должна запрашивать записи.
+        is_paginated = SimpleLazyObject(page.has_other_pages)
+        return page.paginator, page, page, is_paginated
 
 
-def _add_paginator_page(request, instance, ):
+def _add_paginator_page(request, instance, per_page=None,
+                        fields=('pub_date', 'id'), item=None):
     """функция добавления пагинации"""
-    paginator = Paginator(instance, settings.COUNT_POST_PAGE)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    paginator = CursorPaginator(
+        instance, per_page or settings.COUNT_POST_PAGE, fields, item
+    )
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
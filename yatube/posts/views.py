@@ -1,29 +1,41 @@
+from datetime import datetime, time, timedelta
+from operator import attrgetter
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django.views.generic import DetailView, ListView
 
+from core.db_router import replica_reads
+from core.ratelimit import ratelimit
+from core.sqlite_tuning import retry_on_lock
+
+from . import conditional, counters, exports, search, timeline
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .utls import _add_paginator_page
+from .models import Comment, Follow, Group, Post, User
+from .utls import CursorPaginationMixin, _add_paginator_page
 
 
-class IndexHome(ListView):
+@method_decorator(replica_reads, name='get')
+@method_decorator(conditional.condition(conditional.index), name='get')
+class IndexHome(CursorPaginationMixin, ListView):
     """Домашния страница"""
     model = Post
     template_name = 'posts/index.html'
     paginate_by = settings.COUNT_POST_PAGE
-
-    @method_decorator(cache_page(settings.CACHE_TIME, key_prefix='index_page'))
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+    queryset = Post.objects.select_related('author', 'group')
 
 
-
-class GroupPosts(ListView):
+@method_decorator(replica_reads, name='get')
+@method_decorator(conditional.condition(conditional.group_list), name='get')
+class GroupPosts(CursorPaginationMixin, ListView):
     """Страница для групп"""
     model = Post
     template_name = 'posts/group_list.html'
@@ -35,10 +47,14 @@ class GroupPosts(ListView):
         return context
 
     def get_queryset(self):
-        return Post.objects.filter(group__slug=self.kwargs['slug'])
+        return Post.objects.select_related('author', 'group').filter(
+            group__slug=self.kwargs['slug']
+        )
 
 
-class Profile(LoginRequiredMixin, ListView):
+@method_decorator(replica_reads, name='get')
+@method_decorator(conditional.condition(conditional.profile), name='get')
+class Profile(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """
     View-класс для отображения страницы профиля пользователя.
     """
@@ -49,7 +65,7 @@ class Profile(LoginRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        author = get_object_or_404(User, username=self.kwargs['username'])
+        author = self.author
         following = (
             self.request.user.is_authenticated and Follow.objects.filter(
                     user=self.request.user,
@@ -58,7 +74,7 @@ class Profile(LoginRequiredMixin, ListView):
         context.update({
             'author': author,
             'following': following,
-            'post_author': author.post.all(),
+            'stats': counters.stats_for(author),
         })
         return context
 
@@ -67,10 +83,15 @@ class Profile(LoginRequiredMixin, ListView):
         Возвращает список постов, связанных с автором,
         чей профиль отображается на странице.
         """
-        author = get_object_or_404(User, username=self.kwargs['username'])
-        return author.post.all()
+        self.author = get_object_or_404(
+            User.objects.select_related('stats'),
+            username=self.kwargs['username']
+        )
+        return self.author.post.select_related('group')
 
 
+@method_decorator(replica_reads, name='get')
+@method_decorator(conditional.condition(conditional.post_detail), name='get')
 class PostDetailView(DetailView, LoginRequiredMixin):
     """
     View-класс для отображения страницы с детальной информацией о посте.
@@ -80,6 +101,7 @@ class PostDetailView(DetailView, LoginRequiredMixin):
     template_name = 'posts/post_detail.html'
     context_object_name = 'post'
     pk_url_kwarg = 'post_id'
+    queryset = Post.objects.select_related('author__stats', 'group')
 
     def get_context_data(self, **kwargs):
         """
@@ -89,8 +111,8 @@ class PostDetailView(DetailView, LoginRequiredMixin):
         """
 
         context = super().get_context_data(**kwargs)
-        post_author_id = self.object.author.post.count()
-        comments = self.object.comments.all()
+        post_author_id = counters.stats_for(self.object.author).posts_count
+        comments = comments_page(self.request, self.object.pk)
         form = CommentForm()
         context.update({
             'count_post_author': post_author_id,
@@ -99,6 +121,7 @@ class PostDetailView(DetailView, LoginRequiredMixin):
         })
         return context
 
+    @method_decorator(ratelimit('comment'))
     def post(self, request, *args, **kwargs):
         """
         обрабатывает POST-запрос на добавление нового комментария к посту.
@@ -116,12 +139,34 @@ class PostDetailView(DetailView, LoginRequiredMixin):
             comment.post = self.object
             comment.author = request.user
             comment.save()
-            return redirect('posts:post_detail', post_id=self.kwargs['pk'])
+            return redirect('posts:post_detail', post_id=self.object.pk)
         return self.render_to_response(self.get_context_data(form=form))
 
 
+def comments_page(request, post_id):
+    """Страница комментариев поста от новых к старым по курсору ?after."""
+    return _add_paginator_page(
+        request,
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        settings.COUNT_COMMENT_PAGE,
+        fields=('created', 'id'),
+    )
+
+
+@replica_reads
+def post_comments(request, post_id):
+    """Фрагмент со следующей пачкой комментариев для подгрузки."""
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404('Пост не найден')
+    return render(request, 'includes/comments.html', {
+        'post_id': post_id,
+        'comments': comments_page(request, post_id),
+    })
+
 
 @login_required
+@ratelimit('post_create')
+@retry_on_lock
 def post_create(request):
     """форма для создания поста"""
     form = PostForm(
@@ -144,6 +189,7 @@ def post_create(request):
 
 
 @login_required
+@retry_on_lock
 def post_edit(request, post_id):
     """форма для редактирование поста"""
     is_edit = get_object_or_404(Post, id=post_id, author=request.user)
@@ -167,6 +213,8 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('comment')
+@retry_on_lock
 def add_comment(request, post_id):
     """форма для создания комментария"""
     post = get_object_or_404(Post, pk=post_id)
@@ -180,10 +228,14 @@ def add_comment(request, post_id):
 
 
 @login_required
+@replica_reads
+@conditional.condition(conditional.follow_index)
 def follow_index(request):
     """делает подписку на автора """
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = _add_paginator_page(request, post_list)
+    post_list, fields, item = timeline.follow_feed(request.user)
+    page_obj = _add_paginator_page(
+        request, post_list, fields=fields, item=item
+    )
     return render(
         request,
         'posts/follow.html',
@@ -191,7 +243,97 @@ def follow_index(request):
     )
 
 
+def _follow_list(request, username, relation):
+    """
+    Подписчики (relation='user') или подписки (relation='author') автора
+    по курсору ?after. Ключ курсора — id пользователя на другой стороне
+    подписки, поэтому страница читается по индексам (author, user)
+    и (user, author) без сортировки, сколько бы подписчиков ни было.
+    """
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    own = 'author' if relation == 'user' else 'user'
+    page_obj = _add_paginator_page(
+        request,
+        Follow.objects.filter(**{own: author}).select_related(relation),
+        settings.COUNT_FOLLOW_PAGE,
+        fields=(f'{relation}_id',),
+        item=attrgetter(relation),
+    )
+    return render(request, 'posts/follow_list.html', {
+        'author': author,
+        'stats': counters.stats_for(author),
+        'followers': relation == 'user',
+        'page_obj': page_obj,
+    })
+
+
+@login_required
+@replica_reads
+def followers(request, username):
+    """Кто подписан на автора."""
+    return _follow_list(request, username, 'user')
+
+
 @login_required
+@replica_reads
+def following(request, username):
+    """На кого подписан автор."""
+    return _follow_list(request, username, 'author')
+
+
+def _day_start(value):
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+def _parse_day(value):
+    """Дата ГГГГ-ММ-ДД или None; ValueError для неверной даты."""
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(value)
+    return day
+
+
+@login_required
+def profile_export(request, username):
+    """Все посты автора потоком в JSON Lines или CSV.
+    Формат выбирается по Accept или параметру format,
+    since и until (ГГГГ-ММ-ДД) ограничивают даты включительно."""
+    export_format = request.GET.get('format') or exports.negotiate(
+        request.headers.get('Accept')
+    )
+    if export_format not in exports.RENDERERS:
+        return HttpResponse(status=406)
+    author = get_object_or_404(User, username=username)
+    posts = author.post.all()
+    try:
+        since = _parse_day(request.GET.get('since'))
+        until = _parse_day(request.GET.get('until'))
+    except ValueError:
+        return HttpResponseBadRequest('Дата должна быть в виде ГГГГ-ММ-ДД')
+    if since is not None:
+        posts = posts.filter(pub_date__gte=_day_start(since))
+    if until is not None:
+        posts = posts.filter(
+            pub_date__lt=_day_start(until + timedelta(days=1))
+        )
+    response = StreamingHttpResponse(
+        exports.RENDERERS[export_format](exports.iter_posts(posts)),
+        content_type=exports.CONTENT_TYPES[export_format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{author.username}-posts.{export_format}"'
+    )
+    response['Vary'] = 'Accept'
+    return response
+
+
+@login_required
+@ratelimit('follow', methods=None)
+@retry_on_lock
 def profile_follow(request, username):
     """Показывает посты подписок"""
     author = get_object_or_404(User, username=username)
@@ -204,6 +346,8 @@ def profile_follow(request, username):
 
 
 @login_required
+@ratelimit('follow', methods=None)
+@retry_on_lock
 def profile_unfollow(request, username):
     """отписка от автора"""
     author = get_object_or_404(User, username=username)
@@ -213,3 +357,26 @@ def profile_unfollow(request, username):
         'posts:profile',
         username=username
     )
+
+
+def search_posts(request):
+    """Поиск по постам и комментариям с ранжированием"""
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    per_page = settings.COUNT_POST_PAGE
+    post_ids = search.search_post_ids(
+        query, limit=per_page + 1, offset=(page - 1) * per_page
+    )
+    found = Post.objects.select_related('author', 'group').in_bulk(
+        post_ids[:per_page]
+    )
+    context = {
+        'query': query,
+        'posts': [found[pk] for pk in post_ids[:per_page] if pk in found],
+        'page': page,
+        'has_next': len(post_ids) > per_page,
+    }
+    return render(request, 'posts/search.html', context)
@@ -0,0 +1,25 @@
+// Подгружает следующую пачку комментариев вместо перехода по ссылке.
+// Без JavaScript ссылка открывает ту же пачку на странице поста.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('.comments-more a[data-fragment]');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  var more = link.parentElement;
+  link.classList.add('disabled');
+  fetch(link.dataset.fragment, {credentials: 'same-origin'})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      more.insertAdjacentHTML('beforebegin', html);
+      more.remove();
+    })
+    .catch(function () {
+      window.location.href = link.href;
+    });
+});
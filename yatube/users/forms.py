@@ -1,5 +1,9 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+
+from core import jobs
+
+from . import mail
 
 User = get_user_model()
 
@@ -8,3 +12,27 @@ class CreationForm(UserCreationForm):
     class Meta:
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо со ссылкой сброса пароля собирает и отправляет воркер
+    очереди фоновых задач. В задачу попадают только id пользователя
+    и адрес сайта: токен и ссылка в базе не хранятся."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        jobs.enqueue(
+            mail.send_password_reset,
+            kwargs={
+                'user_id': context['user'].pk,
+                'context': {
+                    key: context[key] for key in mail.PUBLIC_RESET_CONTEXT
+                },
+                'subject_template_name': subject_template_name,
+                'email_template_name': email_template_name,
+                'from_email': from_email,
+                'html_email_template_name': html_email_template_name,
+            },
+            priority=jobs.HIGH,
+        )
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMultiAlternatives
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+# Часть контекста письма сброса пароля, которую можно хранить в очереди.
+PUBLIC_RESET_CONTEXT = ('domain', 'site_name', 'protocol')
+
+
+def send(subject, body, from_email, recipients, html=None):
+    """Задача очереди: отправляет готовое письмо."""
+    message = EmailMultiAlternatives(subject, body, from_email, recipients)
+    if html is not None:
+        message.attach_alternative(html, 'text/html')
+    message.send()
+
+
+def send_password_reset(user_id, context, subject_template_name,
+                        email_template_name, from_email=None,
+                        html_email_template_name=None):
+    """Задача очереди: письмо со ссылкой сброса пароля. Токен создаётся
+    здесь, при отправке, и в аргументах задачи его нет."""
+    User = get_user_model()
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return
+    email = getattr(user, User.get_email_field_name())
+    context = {
+        **context,
+        'email': email,
+        'user': user,
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'token': default_token_generator.make_token(user),
+    }
+    subject = ''.join(
+        loader.render_to_string(subject_template_name, context).splitlines()
+    )
+    body = loader.render_to_string(email_template_name, context)
+    html = None
+    if html_email_template_name is not None:
+        html = loader.render_to_string(html_email_template_name, context)
+    send(subject, body, from_email, [email], html)